@@ -0,0 +1,166 @@
+"""Time the stages of publish on synthetic data at several scales.
+
+Usage: python benchmarks/bench_publish.py [options]
+
+For each scale, result files are generated by gen_data.py and loading,
+groupby_fastest, make_speedup_matrices, make_timeline_charts and the whole
+publish command are timed. Throughput is the number of records per second
+and peak memory is measured by tracemalloc in a separate run of each
+stage.
+
+Results are compared with a baseline file written by --save-baseline on
+the same machine. The exit status is 1 when a stage is slower than the
+baseline by more than --tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from gen_data import add_arguments, generate
+
+from cbtk.main import load_directory, main as cbtk_main
+from cbtk.pages.timeline import make_timeline_charts
+from cbtk.speedup import groupby_fastest, make_speedup_matrices
+
+SCALES = {
+    "small": 50,
+    "medium": 200,
+    "large": 1000,
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def make_stages(data_dir, output_dir, num_runners):
+    config = argparse.Namespace(geomean=False, jobs=1)
+    runner_order = ",".join(f"runner{i}" for i in range(num_runners))
+    state = {}
+
+    def load():
+        state["all"] = load_directory(data_dir)
+        state["records"] = [
+            r for r in state["all"] if r.hostname == "host0"
+        ]
+
+    def publish():
+        with contextlib.redirect_stdout(io.StringIO()):
+            cbtk_main([
+                "publish", "-d", data_dir, "--hostname", "host0", "-o",
+                output_dir, "--runner-order", runner_order
+            ])
+
+    return [
+        ("load", load, lambda: len(state["all"])),
+        ("groupby_fastest", lambda: groupby_fastest(state["records"]),
+         lambda: len(state["records"])),
+        ("make_speedup_matrices",
+         lambda: make_speedup_matrices(state["records"], config),
+         lambda: len(state["records"])),
+        ("make_timeline_charts",
+         lambda: make_timeline_charts(state["records"], config),
+         lambda: len(state["records"])),
+        ("publish", publish, lambda: len(state["all"])),
+    ]
+
+
+def measure(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+
+def run_scale(name, runs, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        gen_args = argparse.Namespace(**vars(args))
+        gen_args.runs = runs
+        generate(data_dir, gen_args)
+
+        results = {}
+        output_dir = os.path.join(tmp, "public")
+        for stage, func, count in make_stages(data_dir, output_dir,
+                                              args.runners):
+            seconds, peak = measure(func, args.repeat)
+            results[stage] = {
+                "seconds": seconds,
+                "records_per_sec": count() / seconds,
+                "peak_mb": peak / (1024 * 1024),
+            }
+        return results
+
+
+def compare(results, baseline, tolerance):
+    """Print results with ratios to baseline and return True if slower."""
+    slower = False
+    for scale, stages in results.items():
+        for stage, r in stages.items():
+            line = (f"{scale:8} {stage:24} {r['seconds']:9.3f} sec "
+                    f"{r['records_per_sec']:12.0f} rec/sec "
+                    f"{r['peak_mb']:9.1f} MB")
+            base = baseline.get(scale, {}).get(stage)
+            if base is not None:
+                ratio = r["seconds"] / base["seconds"]
+                line += f" {ratio:6.2f}x"
+                if ratio > 1.0 + tolerance:
+                    line += " SLOWER"
+                    slower = True
+            print(line)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", action="append", choices=list(SCALES),
+                        help="scales to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of timed runs, the fastest is used")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write results to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="ratio of slowdown regarded as a regression")
+    add_arguments(parser, runs=False)
+    args = parser.parse_args()
+
+    results = {
+        name: run_scale(name, SCALES[name], args)
+        for name in (args.scale or SCALES)
+    }
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    slower = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"saved baseline to {args.baseline}")
+
+    if slower:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
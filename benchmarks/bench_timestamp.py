@@ -0,0 +1,59 @@
+"""Compare dateutil and cbtk.timestamp on run_at strings of a result file.
+
+Usage: python benchmarks/bench_timestamp.py [RESULT_FILE]
+
+Without RESULT_FILE, run_at strings of a synthetic file with 100000
+records are used.
+"""
+import datetime
+import json
+import sys
+import time
+
+import dateutil.parser
+
+from cbtk.timestamp import parse_timestamp
+
+
+def load_run_ats(filename):
+    with open(filename) as f:
+        dic = json.load(f)
+    return [raw["metadata"]["run_at"] for raw in dic["records"]]
+
+
+def make_run_ats(n):
+    t0 = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+    # a few records share run_at as in files written by a benchmark run
+    return [(t0 + datetime.timedelta(seconds=i // 4)).isoformat()
+            for i in range(n)]
+
+
+def bench(name, func, run_ats):
+    start = time.perf_counter()
+    for text in run_ats:
+        func(text)
+    elapsed = time.perf_counter() - start
+    print(f"{name:30} {elapsed:8.3f} sec "
+          f"{len(run_ats) / elapsed:12.0f} strings/sec")
+    return elapsed
+
+
+def main():
+    if len(sys.argv) > 1:
+        run_ats = load_run_ats(sys.argv[1])
+    else:
+        run_ats = make_run_ats(100000)
+
+    base = bench("dateutil.parser.parse", dateutil.parser.parse, run_ats)
+
+    parse_timestamp.cache_clear()
+    fast = bench("parse_timestamp", parse_timestamp, run_ats)
+    print(f"speedup: {base / fast:.1f}x")
+
+    if not all(dateutil.parser.parse(s) == parse_timestamp(s)
+               for s in run_ats[:1000]):
+        raise RuntimeError("results differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Generate synthetic result files in the 1.0.0 format.
+
+Usage: python benchmarks/gen_data.py [options] OUTPUT_DIR
+
+One file is written per run. A run has records of every host, suite and
+runner. Each runner has the given number of release versions and a run
+uses one of them in turn, so that the history of a runner has version
+boundaries like a real one.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+
+FORMAT_VERSION = "1.0.0"
+
+
+def make_versions(runner, num_versions):
+    major = runner + 1
+    return [f"{major}.{v // 10}.{v % 10}" for v in range(num_versions)]
+
+
+def make_run(run, args, rng):
+    t0 = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+    records = []
+    for host in range(args.hosts):
+        for suite in range(args.suites):
+            for runner in range(args.runners):
+                versions = make_versions(runner, args.versions)
+                version = versions[run * len(versions) // args.runs]
+                run_at = t0 + datetime.timedelta(
+                    hours=run, seconds=rng.randint(0, 3000))
+                # each runner is slower or faster by a constant factor
+                scale = 1.0 + 0.1 * runner
+                records += [{
+                    "metadata": {
+                        "suite": {"name": f"suite{suite}", "tags": None},
+                        "runner": {
+                            "name": f"runner{runner}",
+                            "version": version,
+                            "tags": None
+                        },
+                        "hostname": f"host{host}",
+                        "run_at": run_at.isoformat(),
+                    },
+                    "duration": {
+                        f"bench{b}": scale * rng.uniform(1.0, 1.1)
+                        for b in range(args.benchmarks)
+                    }
+                }]
+    return records
+
+
+def generate(output_dir, args):
+    """Write result files and return the number of records."""
+    rng = random.Random(args.seed)
+    os.makedirs(output_dir, exist_ok=True)
+    count = 0
+    for run in range(args.runs):
+        records = make_run(run, args, rng)
+        filename = os.path.join(output_dir, f"run{run:06}.json")
+        with open(filename, "w") as f:
+            json.dump({"version": FORMAT_VERSION, "records": records}, f)
+        count += len(records)
+    return count
+
+
+def add_arguments(parser, runs=True):
+    """Add options of generated data. bench_publish.py gives the number of
+    runs by scales instead of --runs."""
+    parser.add_argument("--hosts", type=int, default=2)
+    parser.add_argument("--suites", type=int, default=4)
+    parser.add_argument("--runners", type=int, default=3)
+    parser.add_argument("--versions", type=int, default=5,
+                        help="number of versions per runner")
+    parser.add_argument("--benchmarks", type=int, default=20,
+                        help="number of benchmarks per suite")
+    if runs:
+        parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output_dir")
+    add_arguments(parser)
+    args = parser.parse_args()
+    count = generate(args.output_dir, args)
+    print(f"wrote {count} records in {args.runs} files to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
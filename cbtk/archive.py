@@ -0,0 +1,358 @@
+"""Binary segment format of records.
+
+A segment holds records of any number of result files. A segment file
+consists of one or more segments one after another, and grows by
+appending a segment of new result files. A segment consists of:
+
+- magic (8 bytes) and the length of the header (8 bytes)
+- JSON header with string tables of hosts, suites, runners and benchmarks,
+  and result files which the segment was made of
+- arrays of records: host id, suite id, runner id, UTC offset in seconds,
+  run_at in microseconds since the epoch and index of the first value
+- arrays of values: benchmark id and duration
+
+Each segment and each array is aligned to 8 bytes and arrays are in native
+byte order. Segments are read through mmap so that records can be
+filtered by ids without decoding the others.
+"""
+from array import array
+import datetime
+import itertools
+import json
+import mmap
+import operator
+import os
+import struct
+import sys
+
+from cbtk.core import Record, Runner, Suite, Version
+from cbtk.timestamp import to_aware
+
+MAGIC = b"CBTKSEG1"
+SEGMENT_SUFFIX = ".cbtk"
+SEGMENT_VERSION = 1
+
+# UTC offset of naive run_at
+NAIVE = -(2**31)
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_EPOCH_NAIVE = _EPOCH.replace(tzinfo=None)
+_US = datetime.timedelta(microseconds=1)
+
+_RECORD_ARRAYS = (("host", "I"), ("suite", "I"), ("runner", "I"),
+                  ("utcoffset", "i"), ("run_at", "q"))
+_VALUE_ARRAYS = (("bench", "I"), ("value", "d"))
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _intern(table, key):
+    id_ = table.get(key)
+    if id_ is None:
+        id_ = table[key] = len(table)
+    return id_
+
+
+def write_segment(filename, records, files=(), append=False):
+    """Write records to a segment file.
+
+    files are result files of records, which are not loaded from a data
+    directory with the segment. When append is true, the segment is added
+    to the end of the file.
+    """
+    hosts, suites, runners, benchmarks = {}, {}, {}, {}
+    columns = {name: array(code) for name, code in _RECORD_ARRAYS}
+    columns["start"] = array("Q", [0])
+    columns.update({name: array(code) for name, code in _VALUE_ARRAYS})
+
+    for record in records:
+        run_at = record.run_at
+        utcoffset = run_at.utcoffset()
+        if utcoffset is None:
+            columns["utcoffset"].append(NAIVE)
+            columns["run_at"].append((run_at - _EPOCH_NAIVE) // _US)
+        else:
+            columns["utcoffset"].append(utcoffset.days * 86400 +
+                                        utcoffset.seconds)
+            columns["run_at"].append((run_at - _EPOCH) // _US)
+
+        columns["host"].append(_intern(hosts, record.hostname))
+        columns["suite"].append(
+            _intern(suites, (record.suite.name, record.suite.tags)))
+        runner = record.runner
+        columns["runner"].append(
+            _intern(runners, (runner.name, str(runner.version), runner.tags)))
+
+        for name, dur in record.get_values_by_metric("duration").items():
+            columns["bench"].append(_intern(benchmarks, name))
+            columns["value"].append(dur)
+        columns["start"].append(len(columns["value"]))
+
+    header = json.dumps({
+        "version": SEGMENT_VERSION,
+        "byteorder": sys.byteorder,
+        "num_records": len(columns["host"]),
+        "num_values": len(columns["value"]),
+        "hosts": list(hosts),
+        "suites": list(suites),
+        "runners": list(runners),
+        "benchmarks": list(benchmarks),
+        "files": _relative_paths(files, filename),
+    }).encode()
+
+    with open(filename, "ab" if append else "wb") as f:
+        f.write(b"\0" * (_align(f.tell()) - f.tell()))
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name in _column_names():
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            columns[name].tofile(f)
+
+
+def _relative_paths(files, filename):
+    # relative to the segment, so that a data directory can be moved
+    directory = os.path.dirname(os.path.abspath(filename))
+    return [
+        os.path.relpath(os.path.abspath(f), directory).replace(os.sep, "/")
+        for f in files
+    ]
+
+
+def _column_names():
+    return ([name for name, _ in _RECORD_ARRAYS] + ["start"] +
+            [name for name, _ in _VALUE_ARRAYS])
+
+
+def _column_codes():
+    return dict(_RECORD_ARRAYS + (("start", "Q"), ) + _VALUE_ARRAYS)
+
+
+def _read_header(buf, pos, filename):
+    """Return the header of the segment at pos and the position of its
+    first array."""
+    if buf[pos:pos + 8] != MAGIC:
+        raise ValueError(f"not a segment file: {filename}")
+    if len(buf) < pos + 16:
+        raise ValueError(f"truncated segment: {filename}")
+    (header_len, ) = struct.unpack_from("<Q", buf, pos + 8)
+    start = pos + 16
+    header = json.loads(bytes(buf[start:start + header_len]))
+    if (header["version"] != SEGMENT_VERSION
+            or header["byteorder"] != sys.byteorder):
+        raise ValueError(f"unsupported segment: {filename}")
+    return header, start + header_len
+
+
+def _array_spans(header, pos):
+    """Yield (name, code, start, end) of arrays of a segment from pos."""
+    lengths = {name: header["num_records"] for name, _ in _RECORD_ARRAYS}
+    lengths["start"] = header["num_records"] + 1
+    lengths.update(
+        {name: header["num_values"]
+         for name, _ in _VALUE_ARRAYS})
+
+    codes = _column_codes()
+    for name in _column_names():
+        pos = _align(pos)
+        size = lengths[name] * array(codes[name]).itemsize
+        yield name, codes[name], pos, pos + size
+        pos += size
+
+
+def _iter_headers(buf, filename):
+    """Yield (header, position of arrays) of segments in buf."""
+    pos = 0
+    while pos < len(buf):
+        header, start = _read_header(buf, pos, filename)
+        *_, end = list(_array_spans(header, start))[-1]
+        if end > len(buf):
+            raise ValueError(f"truncated segment: {filename}")
+        yield header, start
+        pos = _align(end)
+
+
+def _map_file(filename):
+    """Return a read-only mmap of filename, or None if it is empty."""
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def segment_files(filename):
+    """Return absolute paths of result files in segments of filename."""
+    mm = _map_file(filename)
+    if mm is None:
+        return []
+    directory = os.path.dirname(os.path.abspath(filename))
+    try:
+        return [
+            os.path.normpath(os.path.join(directory, f))
+            for header, _ in _iter_headers(mm, filename)
+            for f in header.get("files", [])
+        ]
+    finally:
+        mm.close()
+
+
+class Segment:
+    """A segment in a mapped segment file."""
+
+    def __init__(self, buf, header, pos):
+        self.hosts = header["hosts"]
+        self.suites = [Suite.intern(name, tags)
+                       for name, tags in header["suites"]]
+        self.runners = [
+            Runner.intern(name, Version.parse(version), tags)
+            for name, version, tags in header["runners"]
+        ]
+        self.benchmarks = header["benchmarks"]
+        self.files = header.get("files", [])
+        self._num_records = header["num_records"]
+
+        self._views = []
+        self.columns = {}
+        for name, code, start, end in _array_spans(header, pos):
+            view = buf[start:end].cast(code)
+            self._views.append(view)
+            self.columns[name] = view
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.columns = {}
+
+    def __len__(self):
+        return self._num_records
+
+    def run_at(self, index):
+        us = datetime.timedelta(microseconds=self.columns["run_at"][index])
+        utcoffset = self.columns["utcoffset"][index]
+        if utcoffset == NAIVE:
+            return _EPOCH_NAIVE + us
+        tz = datetime.timezone(datetime.timedelta(seconds=utcoffset))
+        return (_EPOCH + us).astimezone(tz)
+
+    def record(self, index):
+        columns = self.columns
+        bench = columns["bench"]
+        value = columns["value"]
+        start, end = columns["start"][index], columns["start"][index + 1]
+        values = {
+            self.benchmarks[bench[j]]: {"duration": value[j]}
+            for j in range(start, end)
+        }
+        return Record(suite=self.suites[columns["suite"][index]],
+                      runner=self.runners[columns["runner"][index]],
+                      run_at=self.run_at(index),
+                      hostname=self.hosts[columns["host"][index]],
+                      values=values)
+
+    def indices(self, record_filter=None):
+        """Return indices of records which match record_filter.
+
+        Hosts, suites and runners are matched once per entry of the string
+        tables, and ids and run_at of records are compared without
+        decoding records.
+        """
+        if record_filter is None:
+            return range(len(self))
+
+        f = record_filter
+        tables = [
+            ("host", [f.match_hostname(h) for h in self.hosts]),
+            ("suite", [f.match_suite(s.name, s.tags) for s in self.suites]),
+            ("runner", [
+                f.match_runner_name(r.name) and f.match_version(r.version)
+                for r in self.runners
+            ]),
+        ]
+
+        masks = []
+        for name, ok in tables:
+            if not any(ok):
+                return []
+            if not all(ok):
+                masks.append(bytes(map(ok.__getitem__, self.columns[name])))
+
+        # naive run_at is stored as UTC as match_run_at regards it
+        run_ats = self.columns["run_at"]
+        if f.since is not None:
+            since = (to_aware(f.since) - _EPOCH) // _US
+            masks.append(bytes(map(operator.le, itertools.repeat(since),
+                                   run_ats)))
+        if f.until is not None:
+            until = (to_aware(f.until) - _EPOCH) // _US
+            masks.append(bytes(map(operator.ge, itertools.repeat(until),
+                                   run_ats)))
+
+        if not masks:
+            return range(len(self))
+        mask = masks[0]
+        for m in masks[1:]:
+            mask = bytes(map(operator.and_, mask, m))
+        return list(itertools.compress(range(len(self)), mask))
+
+    def iter_records(self, record_filter=None):
+        for index in self.indices(record_filter):
+            yield self.record(index)
+
+
+class SegmentFile:
+    """Segments of a file opened through mmap.
+
+    Use as a context manager, or call close, to release the mapping. An
+    empty file has no segments.
+    """
+
+    def __init__(self, filename):
+        self._mmap = _map_file(filename)
+        self.segments = []
+        if self._mmap is None:
+            return
+
+        self._buf = memoryview(self._mmap)
+        try:
+            for header, pos in _iter_headers(self._buf, filename):
+                self.segments.append(Segment(self._buf, header, pos))
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+        if self._mmap is not None:
+            self._buf.release()
+            self._mmap.close()
+
+    def __len__(self):
+        return sum(len(segment) for segment in self.segments)
+
+    def iter_records(self, record_filter=None):
+        for segment in self.segments:
+            yield from segment.iter_records(record_filter)
+
+
+def load_segment(filename, record_filter=None):
+    """Return records in a segment file sorted by run_at.
+
+    Matching records are sorted by run_at in the arrays before they are
+    decoded.
+    """
+    with SegmentFile(filename) as f:
+        selected = [(segment, index) for segment in f.segments
+                    for index in segment.indices(record_filter)]
+        selected.sort(key=lambda s: s[0].columns["run_at"][s[1]])
+        return [segment.record(index) for segment, index in selected]
@@ -0,0 +1,94 @@
+"""Fingerprinted and precompressed static files of a site.
+
+A fingerprinted file has a part of its content digest in its name, such
+as timeline.0123456789.js, so that it can be cached forever. Pages refer
+to them through Assets. A .gz sibling, and a .br one when the brotli
+module is available, is written next to each file. Fingerprinted files of
+older contents are removed after a publish.
+"""
+import glob
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIGEST_LENGTH = 10
+
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def fingerprint_name(path, digest):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:DIGEST_LENGTH]}{ext}"
+
+
+def fingerprint_pattern(path):
+    """Return a glob pattern of fingerprinted names of path."""
+    root, ext = os.path.splitext(path)
+    return (glob.escape(root) + "." + "[0-9a-f]" * DIGEST_LENGTH +
+            glob.escape(ext))
+
+
+def compress(path):
+    """Write compressed siblings of path which do not exist yet."""
+    data = None
+    siblings = [(".gz", lambda d: gzip.compress(d, mtime=0))]
+    if brotli is not None:
+        siblings += [(".br", brotli.compress)]
+
+    for suffix, func in siblings:
+        if os.path.exists(path + suffix):
+            continue
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        with open(path + suffix, "wb") as f:
+            f.write(func(data))
+
+
+class Assets:
+    """Fingerprinted names of files under an output directory."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.names = {}
+
+    def add(self, path, hashed_path):
+        """Register hashed_path as the fingerprinted file of path."""
+        self.names[os.path.normpath(path)] = os.path.normpath(hashed_path)
+        compress(hashed_path)
+
+    def url(self, base_dir, url):
+        """Return url relative to base_dir with the fingerprinted name."""
+        path = os.path.normpath(os.path.join(base_dir, url))
+        hashed = self.names.get(path)
+        if hashed is None:
+            return url
+        return os.path.relpath(hashed, base_dir).replace(os.sep, "/")
+
+    def root_url(self, url):
+        """Return url relative to the output directory."""
+        return self.url(self.output_dir, url)
+
+    def prune(self, manifest=None):
+        """Remove fingerprinted files of registered paths other than the
+        current ones, with their compressed siblings. Returns removed
+        files."""
+        removed = []
+        for path, hashed in self.names.items():
+            for old in glob.glob(fingerprint_pattern(path)):
+                old = os.path.normpath(old)
+                if old == hashed:
+                    continue
+                for p in [old] + [old + s for s in COMPRESSED_SUFFIXES]:
+                    try:
+                        os.unlink(p)
+                    except FileNotFoundError:
+                        pass
+                if manifest is not None:
+                    manifest.remove(old)
+                removed += [old]
+        return removed
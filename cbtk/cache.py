@@ -0,0 +1,88 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Bump when the layout of pickled records changes so that old entries are
+# ignored.
+CACHE_FORMAT = 3
+
+DEFAULT_CACHE_DIR = ".cbtk-cache"
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+
+class RecordCache:
+    """On-disk cache of records loaded from result files.
+
+    One entry is stored per result file. An entry is valid while the path,
+    size and mtime of the file and the format version of the loader are
+    the same as when the entry was written. Otherwise the file is parsed
+    again and the entry is replaced.
+    """
+
+    def __init__(self, directory, format_version, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.format_version = format_version
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, filename):
+        digest = hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()
+        return os.path.join(self.directory, digest + ".pickle")
+
+    def _make_key(self, filename):
+        st = os.stat(filename)
+        return (CACHE_FORMAT, self.format_version, os.path.abspath(filename),
+                st.st_size, st.st_mtime_ns)
+
+    def _read(self, path, key):
+        try:
+            with open(path, "rb") as f:
+                entry_key, records = pickle.load(f)
+        except Exception:
+            # missing or broken entry
+            return None
+
+        if entry_key != key:
+            return None
+
+        # touch to keep recently used entries when pruning
+        os.utime(path)
+        return records
+
+    def _write(self, path, key, records):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((key, records), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def load(self, filename, loader):
+        """Return records of filename from the cache, or call loader."""
+        key = self._make_key(filename)
+        path = self._entry_path(filename)
+        records = self._read(path, key)
+        if records is None:
+            records = loader(filename)
+            self._write(path, key, records)
+        return records
+
+    def prune(self):
+        """Remove least recently used entries until the cache fits in
+        max_size bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".pickle"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            os.unlink(path)
+            total -= size
@@ -1,18 +1,44 @@
 from collections import defaultdict
 import copy
 import re
+import weakref
 
 
 class Runner:
+    """Runner of benchmarks.
+
+    Runner is immutable. Use Runner.intern to share one instance among equal
+    runners. Interned runners are held weakly so that a long-running watch
+    or serve does not keep runners of removed records.
+    """
+
+    __slots__ = ("name", "version", "tags", "sort_key", "_hash",
+                 "__weakref__")
+
+    _instances = weakref.WeakValueDictionary()
 
     def __init__(self, name, version: "Version", tags=None):
         self.name = name
         self.version = version
         self.tags = tags
+        self.sort_key = (name, version.sort_key)
+        self._hash = hash((name, str(version), tags))
 
     @classmethod
-    def from_dict(self, dic):
-        return Runner(dic["name"], Version.parse(dic["version"]), dic["tags"])
+    def intern(cls, name, version: "Version", tags=None):
+        key = (name, version, tags)
+        runner = cls._instances.get(key)
+        if runner is None:
+            runner = cls._instances[key] = cls(name, version, tags)
+        return runner
+
+    @classmethod
+    def from_dict(cls, dic):
+        return cls.intern(dic["name"], Version.parse(dic["version"]),
+                          dic["tags"])
+
+    def __reduce__(self):
+        return (Runner.intern, (self.name, self.version, self.tags))
 
     def __format__(self, spec):
         return f"{str(self):{spec}}"
@@ -27,33 +53,53 @@ class Runner:
         return f"{self.name}-{self.version}"
 
     def drop_dev_version(self):
-        return Runner(self.name, self.version.drop_dev(), self.tags)
+        return Runner.intern(self.name, self.version.drop_dev(), self.tags)
 
     def is_older_patch(self, other):
         return (self.name == other.name
                 and self.version.is_older_patch(other.version))
 
     def __lt__(self, other):
-        if self.name != other.name:
-            return self.name < other.name
-        return self.version < other.version
+        return self.sort_key < other.sort_key
 
     def __eq__(self, other):
         return self.name == other.name and self.version == other.version
 
     def __hash__(self):
-        return hash((self.name, str(self.version), self.tags))
+        return self._hash
 
 
 class Suite:
+    """Benchmark suite.
+
+    Suite is immutable. Use Suite.intern to share one instance among equal
+    suites. Interned suites are held weakly as runners are.
+    """
+
+    __slots__ = ("name", "tags", "sort_key", "_hash", "__weakref__")
+
+    _instances = weakref.WeakValueDictionary()
 
     def __init__(self, name, tags=None):
         self.name = name
         self.tags = tags
+        self.sort_key = name
+        self._hash = hash((name, tags))
+
+    @classmethod
+    def intern(cls, name, tags=None):
+        key = (name, tags)
+        suite = cls._instances.get(key)
+        if suite is None:
+            suite = cls._instances[key] = cls(name, tags)
+        return suite
 
     @classmethod
     def from_dict(cls, dic):
-        return Suite(dic["name"], dic.get("tags"))
+        return cls.intern(dic["name"], dic.get("tags"))
+
+    def __reduce__(self):
+        return (Suite.intern, (self.name, self.tags))
 
     def __repr__(self):
         if self.tags:
@@ -64,20 +110,53 @@ class Suite:
         return self.name == other.name and self.tags == other.tags
 
     def __hash__(self):
-        return hash((self.name, self.tags))
+        return self._hash
 
     def __lt__(self, other):
         return self.name < other.name
 
 
 class Version:
+    """Version of a runner.
+
+    Version is immutable. Version.parse returns a shared instance for each
+    distinct version while it is in use. Shared versions are held weakly as
+    runners are.
+    """
+
+    __slots__ = ("_version", "_dist", "sort_key", "_hash", "__weakref__")
+
+    _instances = weakref.WeakValueDictionary()
+    _parsed = weakref.WeakValueDictionary()
 
     def __init__(self, major, minor, patch, dev=None, dist=None):
         self._version = (major, minor, patch, dev)
         self._dist = dist
+        # 0.5.1 is newer, or greater, than 0.5.1.devXXX
+        if dist is None:
+            self.sort_key = (major, minor, patch, 1, 0)
+        else:
+            self.sort_key = (major, minor, patch, 0, dist)
+        self._hash = hash(self._version)
+
+    @classmethod
+    def intern(cls, major, minor, patch, dev=None, dist=None):
+        key = (major, minor, patch, dev)
+        version = cls._instances.get(key)
+        if version is None:
+            version = cls._instances[key] = cls(major, minor, patch, dev,
+                                                dist)
+        return version
 
     @classmethod
     def parse(cls, text):
+        version = cls._parsed.get(text)
+        if version is None:
+            version = cls._parsed[text] = cls._parse(text)
+        return version
+
+    @classmethod
+    def _parse(cls, text):
         m = re.match(r"(\d+)\.(\d+)\.(\d+)\.?(dev.*)?", text)
         if m is None:
             raise ValueError(f"Unexpected version string: {text}")
@@ -89,7 +168,10 @@ class Version:
             if m is None:
                 raise ValueError(f"illegal dev version: {dev}")
             dist = int(m.group(1))
-        return Version(major, minor, patch, dev, dist)
+        return cls.intern(major, minor, patch, dev, dist)
+
+    def __reduce__(self):
+        return (Version.intern, self._version + (self._dist, ))
 
     @property
     def major(self):
@@ -104,7 +186,7 @@ class Version:
         return self._version[2]
 
     def drop_dev(self):
-        return Version(self.major, self.minor, self.patch)
+        return Version.intern(self.major, self.minor, self.patch)
 
     def is_older_patch(self, other):
         """Return true if self has the same major and minor as other, and older
@@ -117,7 +199,7 @@ class Version:
         return self._version == other._version
 
     def __hash__(self):
-        return hash(self._version)
+        return self._hash
 
     def __repr__(self):
         ver = ".".join([str(x) for x in self._version[0:3]])
@@ -127,15 +209,7 @@ class Version:
         return ver
 
     def __lt__(self, other):
-        if self._version[:3] == other._version[:3]:
-            # compare dev version.
-            # 0.5.1 is newer, or greater, than 0.5.1.devXXX
-            if self._dist is None:
-                return False
-            if other._dist is None:
-                return True
-            return self._dist < other._dist
-        return self._version < other._version
+        return self.sort_key < other.sort_key
 
 
 class Record:
@@ -154,9 +228,9 @@ class Record:
         self._values = values
 
     def deepcopy(self):
-        return Record(suite=Suite(self.suite.name, self.suite.tags),
-                      runner=Runner(self.runner.name, self.runner.version,
-                                    self.runner.tags),
+        # suite and runner are immutable
+        return Record(suite=self.suite,
+                      runner=self.runner,
                       run_at=self.run_at,
                       hostname=self.hostname,
                       values=copy.deepcopy(self._values))
@@ -187,7 +261,7 @@ def groupby(records, *, key, agg_func=None, sort_func=None):
     assert callable(key)
     grouped = defaultdict(list)
     for record in records:
-        grouped[key(record)] += [record]
+        grouped[key(record)].append(record)
 
     sort_func = sort_func or sorted
 
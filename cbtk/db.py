@@ -0,0 +1,193 @@
+import os
+import pathlib
+import sqlite3
+
+from cbtk.core import Record, Runner, Suite, Version
+from cbtk.timestamp import parse_timestamp, to_aware
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    hostname TEXT,
+    suite TEXT NOT NULL,
+    suite_tags TEXT,
+    runner TEXT NOT NULL,
+    runner_version TEXT NOT NULL,
+    runner_tags TEXT,
+    run_at TEXT NOT NULL,
+    -- naive run_at is regarded as UTC
+    run_at_epoch REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS durations (
+    record_id INTEGER NOT NULL REFERENCES records(id),
+    benchmark TEXT NOT NULL,
+    -- no type, so that integers are not converted to floats
+    duration NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_hostname ON records(hostname);
+CREATE INDEX IF NOT EXISTS records_suite ON records(suite);
+CREATE INDEX IF NOT EXISTS records_runner ON records(runner);
+CREATE INDEX IF NOT EXISTS records_run_at ON records(run_at_epoch);
+CREATE INDEX IF NOT EXISTS records_source ON records(source_id);
+CREATE INDEX IF NOT EXISTS durations_record ON durations(record_id);
+"""
+
+# Number of files inserted in a transaction
+BATCH_SIZE = 256
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def connect_readonly(path):
+    """Connect to an existing database without creating one."""
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"database not found: {path}")
+    uri = pathlib.Path(os.path.abspath(path)).as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+
+def _find_stale(conn, filenames):
+    """Return filenames which are new or changed since the last ingest."""
+    stale = []
+    for filename in filenames:
+        st = os.stat(filename)
+        row = conn.execute("SELECT size, mtime_ns FROM sources WHERE path = ?",
+                           (os.path.abspath(filename), )).fetchone()
+        if row != (st.st_size, st.st_mtime_ns):
+            stale += [filename]
+    return stale
+
+
+def _delete_source(conn, path):
+    row = conn.execute("SELECT id FROM sources WHERE path = ?",
+                       (path, )).fetchone()
+    if row is None:
+        return
+    conn.execute(
+        "DELETE FROM durations WHERE record_id IN "
+        "(SELECT id FROM records WHERE source_id = ?)", row)
+    conn.execute("DELETE FROM records WHERE source_id = ?", row)
+    conn.execute("DELETE FROM sources WHERE id = ?", row)
+
+
+def _insert_records(conn, filename, records):
+    path = os.path.abspath(filename)
+    _delete_source(conn, path)
+
+    st = os.stat(filename)
+    source_id = conn.execute(
+        "INSERT INTO sources (path, size, mtime_ns) VALUES (?, ?, ?)",
+        (path, st.st_size, st.st_mtime_ns)).lastrowid
+
+    for record in records:
+        record_id = conn.execute(
+            "INSERT INTO records (source_id, hostname, suite, suite_tags, "
+            "runner, runner_version, runner_tags, run_at, run_at_epoch) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (source_id, record.hostname, record.suite.name, record.suite.tags,
+             record.runner.name, str(record.runner.version),
+             record.runner.tags, record.run_at.isoformat(),
+             to_aware(record.run_at).timestamp())).lastrowid
+        conn.executemany(
+            "INSERT INTO durations (record_id, benchmark, duration) "
+            "VALUES (?, ?, ?)",
+            [(record_id, name, dur) for name, dur in
+             record.get_values_by_metric("duration").items()])
+
+
+def ingest(path, filenames, load_files):
+    """Insert records of new or changed files into the database at path.
+
+    load_files is called with a list of filenames and returns a list of
+    records per file. Files are inserted in batches of BATCH_SIZE, each in
+    one transaction. Returns the number of ingested files.
+    """
+    conn = connect(path)
+    try:
+        stale = _find_stale(conn, filenames)
+        for i in range(0, len(stale), BATCH_SIZE):
+            batch = stale[i:i + BATCH_SIZE]
+            with conn:
+                for filename, records in zip(batch, load_files(batch)):
+                    _insert_records(conn, filename, records)
+    finally:
+        conn.close()
+    return len(stale)
+
+
+def load_db(path, record_filter=None):
+    """Return records in the database sorted by run_at.
+
+    Hostname and the range of run_at in record_filter are queried with the
+    indexes. Other conditions are checked before records are built.
+    """
+    conditions = []
+    params = []
+    f = record_filter
+    if f is not None and f.hostname is not None:
+        conditions += ["r.hostname = ?"]
+        params += [f.hostname]
+    if f is not None and f.since is not None:
+        conditions += ["r.run_at_epoch >= ?"]
+        params += [to_aware(f.since).timestamp()]
+    if f is not None and f.until is not None:
+        conditions += ["r.run_at_epoch <= ?"]
+        params += [to_aware(f.until).timestamp()]
+    where = ""
+    if conditions:
+        where = "WHERE " + " AND ".join(conditions)
+
+    conn = connect_readonly(path)
+    try:
+        try:
+            # records without durations have a row of NULL durations
+            rows = conn.execute(
+                "SELECT r.id, r.hostname, r.suite, r.suite_tags, r.runner, "
+                "r.runner_version, r.runner_tags, r.run_at, d.benchmark, "
+                "d.duration FROM records r "
+                "LEFT JOIN durations d ON d.record_id = r.id "
+                f"{where} ORDER BY r.run_at_epoch, r.id, d.rowid", params)
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"{path} is not a database made by ingest: "
+                             f"{e}") from e
+
+        records = []
+        last_id = None
+        skip = False
+        for (record_id, hostname, suite, suite_tags, runner, version,
+             runner_tags, run_at, benchmark, duration) in rows:
+            if record_id != last_id:
+                last_id = record_id
+                skip = f is not None and not (
+                    f.match_suite(suite, suite_tags)
+                    and f.match_runner_name(runner)
+                    and f.match_version(Version.parse(version)))
+                if skip:
+                    continue
+                values = {}
+                records += [
+                    Record(suite=Suite.intern(suite, suite_tags),
+                           runner=Runner.intern(runner,
+                                                Version.parse(version),
+                                                runner_tags),
+                           run_at=parse_timestamp(run_at),
+                           hostname=hostname,
+                           values=values)
+                ]
+            if not skip and benchmark is not None:
+                values[benchmark] = {"duration": duration}
+    finally:
+        conn.close()
+
+    return records
@@ -0,0 +1,49 @@
+def lttb(xs, ys, threshold):
+    """Return indices of points selected by Largest-Triangle-Three-Buckets.
+
+    The first and the last points are always selected. All indices are
+    returned when threshold is less than 3 or not less than the number of
+    points.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    every = (n - 2) / (threshold - 2)
+
+    a = 0
+    indices = [0]
+    for i in range(threshold - 2):
+        # average of the next bucket
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_len = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / avg_len
+        avg_y = sum(ys[avg_start:avg_end]) / avg_len
+
+        # select a point in this bucket with the largest triangle
+        ax, ay = xs[a], ys[a]
+        max_area = -1.0
+        selected = start = int(i * every) + 1
+        for j in range(start, int((i + 1) * every) + 1):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) *
+                       (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                selected = j
+
+        indices.append(selected)
+        a = selected
+
+    indices.append(n - 1)
+    return indices
+
+
+def downsample(xs, ys, threshold):
+    """Return indices of about threshold points to draw a line chart.
+
+    All indices are returned when threshold is not positive.
+    """
+    if threshold <= 0:
+        return list(range(len(xs)))
+    return lttb(xs, ys, threshold)
@@ -0,0 +1,96 @@
+import fnmatch
+
+from cbtk.core import Version
+from cbtk.timestamp import parse_timestamp, to_aware
+
+
+def _match_any(patterns, text):
+    return any(fnmatch.fnmatchcase(text, p) for p in patterns)
+
+
+class RecordFilter:
+    """Conditions on records which loaders check before building them.
+
+    suites and runners are lists of glob patterns of names, suite_tags is a
+    glob pattern of suite tags. Versions and run_at ranges are inclusive,
+    and naive run_at is compared as UTC. None means no condition.
+    """
+
+    def __init__(self,
+                 *,
+                 hostname=None,
+                 suites=None,
+                 suite_tags=None,
+                 runners=None,
+                 min_version=None,
+                 max_version=None,
+                 since=None,
+                 until=None):
+        self.hostname = hostname
+        self.suites = suites
+        self.suite_tags = suite_tags
+        self.runners = runners
+        self.min_version = min_version
+        self.max_version = max_version
+        self.since = since
+        self.until = until
+
+    @classmethod
+    def from_config(cls, config):
+        def parse(text, parser):
+            return None if text is None else parser(text)
+
+        return cls(hostname=config.hostname,
+                   suites=config.suite,
+                   suite_tags=config.suite_tags,
+                   runners=config.runner,
+                   min_version=parse(config.min_version, Version.parse),
+                   max_version=parse(config.max_version, Version.parse),
+                   since=parse(config.since, parse_timestamp),
+                   until=parse(config.until, parse_timestamp))
+
+    def match_hostname(self, hostname):
+        return self.hostname is None or hostname == self.hostname
+
+    def match_suite(self, name, tags):
+        if self.suites is not None and not _match_any(self.suites, name):
+            return False
+        return (self.suite_tags is None
+                or fnmatch.fnmatchcase(tags or "", self.suite_tags))
+
+    def match_runner_name(self, name):
+        return self.runners is None or _match_any(self.runners, name)
+
+    def match_version(self, version):
+        if self.min_version is not None and version < self.min_version:
+            return False
+        return self.max_version is None or not self.max_version < version
+
+    def match_run_at(self, run_at):
+        run_at = to_aware(run_at)
+        if self.since is not None and run_at < to_aware(self.since):
+            return False
+        return self.until is None or not to_aware(self.until) < run_at
+
+    def match_raw(self, raw):
+        """Return true if a record in a result file, not decoded yet,
+        matches. Cheap conditions are checked first.
+        """
+        metadata = raw["metadata"]
+        suite = metadata["suite"]
+        runner = metadata["runner"]
+        return (self.match_hostname(metadata["hostname"])
+                and self.match_suite(suite["name"], suite.get("tags"))
+                and self.match_runner_name(runner["name"])
+                and (self.min_version is None and self.max_version is None
+                     or self.match_version(Version.parse(runner["version"])))
+                and (self.since is None and self.until is None
+                     or self.match_run_at(parse_timestamp(
+                         metadata["run_at"]))))
+
+    def match(self, record):
+        return (self.match_hostname(record.hostname)
+                and self.match_suite(record.suite.name, record.suite.tags)
+                and self.match_runner_name(record.runner.name)
+                and self.match_version(record.runner.version)
+                and self.match_run_at(record.run_at))
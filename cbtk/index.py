@@ -0,0 +1,103 @@
+from collections import defaultdict
+
+from cbtk.parallel import get_jobs, map_groups
+from cbtk.speedup import (SuiteRunner, make_speedup_matrices,
+                          make_speedup_matrices_from_groups)
+from cbtk.tracing import stage
+
+
+def _sorted_dict(dic):
+    return {key: dic[key] for key in sorted(dic)}
+
+
+class RecordIndex:
+    """Hash indexes of records built in one pass.
+
+    Lists in the indexes keep the order of records, which are sorted by
+    run_at, and keys are sorted as core.groupby does. Pages query this
+    instead of grouping records by themselves, and speedup matrices of a
+    host are made once for all pages.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        by_host = defaultdict(list)
+        by_suite = defaultdict(list)
+        by_runner = defaultdict(list)
+        by_release = defaultdict(list)
+        by_benchmark = defaultdict(list)
+        by_host_suite_runner = defaultdict(list)
+        by_host_suite_release = defaultdict(list)
+
+        releases = {}
+        for record in records:
+            hostname, suite, runner = (record.hostname, record.suite,
+                                       record.runner)
+            release = releases.get(runner)
+            if release is None:
+                release = releases[runner] = runner.drop_dev_version()
+
+            by_host[hostname].append(record)
+            by_suite[suite].append(record)
+            by_runner[runner].append(record)
+            by_release[release].append(record)
+            for name in record.benchmarks:
+                by_benchmark[name].append(record)
+            by_host_suite_runner[(hostname, suite, runner)].append(record)
+            by_host_suite_release[(hostname, suite, release)].append(record)
+
+        self.by_host = _sorted_dict(by_host)
+        self.by_suite = _sorted_dict(by_suite)
+        self.by_runner = _sorted_dict(by_runner)
+        # runners without dev versions
+        self.by_release = _sorted_dict(by_release)
+        self.by_benchmark = _sorted_dict(by_benchmark)
+        self.by_host_suite_runner = _sorted_dict(by_host_suite_runner)
+        self.by_host_suite_release = _sorted_dict(by_host_suite_release)
+        self._matrices = {}
+
+    @property
+    def hostnames(self):
+        return list(self.by_host)
+
+    def speedup_matrices(self, config, hostname=None):
+        """Return speedup matrices of records of hostname, or of all
+        records when hostname is None. Results are kept for later calls.
+        """
+        if hostname is None and len(self.by_host) == 1:
+            hostname = self.hostnames[0]
+
+        key = (hostname, config.geomean)
+        matrices = self._matrices.get(key)
+        if matrices is not None:
+            return matrices
+
+        if hostname is None:
+            # the fastest of all hosts needs records in the order of run_at
+            matrices = make_speedup_matrices(self.records, config)
+        else:
+            by_suite = defaultdict(dict)
+            for (h, suite, runner), lst in self.by_host_suite_runner.items():
+                if h == hostname:
+                    by_suite[suite][SuiteRunner(suite, runner)] = lst
+            with stage("speedup_matrices"):
+                matrices = {}
+                for dic in map_groups(make_speedup_matrices_from_groups,
+                                      list(by_suite.values()), config,
+                                      jobs=get_jobs(config)):
+                    matrices.update(dic)
+
+        self._matrices[key] = matrices
+        return matrices
+
+    def timeline_groups(self):
+        """Return records by (hostname, suite, runner without dev
+        version), which are records of timeline series."""
+        return self.by_host_suite_release
+
+    def timeline_groups_by_suite(self):
+        """Return timeline_groups split by suite in the order of suites."""
+        by_suite = defaultdict(dict)
+        for key, lst in self.by_host_suite_release.items():
+            by_suite[key[1]][key] = lst
+        return [by_suite[suite] for suite in sorted(by_suite)]
@@ -0,0 +1,175 @@
+import json
+
+CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """Buffered reader which decodes JSON values from a text file."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size):
+        # drop consumed text to keep the buffer small
+        if self.pos > 0:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+        self.buf += chunk
+
+    def peek(self):
+        """Return next non-whitespace character, or "" at the end of file."""
+        while True:
+            buf = self.buf
+            while self.pos < len(buf) and buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill(self.chunk_size)
+
+    def expect(self, chars):
+        ch = self.peek()
+        if ch == "" or ch not in chars:
+            raise ValueError(f"expected one of {chars!r} but got {ch!r} "
+                             f"in JSON stream")
+        self.pos += 1
+        return ch
+
+    def decode(self):
+        """Decode one JSON value at the current position."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a number at the end of buffer may continue in next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+
+class RawJSON(str):
+    """JSON text of a value which is written as it is."""
+
+
+def encode(value, indent=None):
+    """Return value encoded as iter_encode_array and iter_encode_object
+    encode their values, so that it can be given to them as RawJSON."""
+    return RawJSON(_encode(value, indent))
+
+
+def _encode(value, indent):
+    if isinstance(value, RawJSON):
+        return value
+    if indent is None:
+        return json.dumps(value, separators=(",", ":"))
+    # strings in JSON have no newline, so this only indents lines
+    return json.dumps(value, indent=indent).replace("\n", "\n" + " " * indent)
+
+
+def _iter_encode(pieces, indent, brackets):
+    opening, closing = brackets
+    if indent is None:
+        first, sep, last = opening, ",", closing
+    else:
+        pad = " " * indent
+        first, sep, last = opening + "\n" + pad, ",\n" + pad, "\n" + closing
+
+    empty = True
+    for piece in pieces:
+        yield (first if empty else sep) + piece
+        empty = False
+    yield opening + closing if empty else last
+
+
+def iter_encode_array(values, indent=None):
+    """Yield a JSON array of values piece by piece.
+
+    Each value is encoded when it is taken from values. The result is the
+    same as json.dumps of the list with indent, or without whitespace when
+    indent is None.
+    """
+    return _iter_encode((_encode(v, indent) for v in values), indent, "[]")
+
+
+def iter_encode_object(items, indent=None):
+    """Yield a JSON object of (key, value) pairs piece by piece.
+
+    See iter_encode_array.
+    """
+    colon = ":" if indent is None else ": "
+    return _iter_encode(
+        (json.dumps(k) + colon + _encode(v, indent) for k, v in items),
+        indent, "{}")
+
+
+def iter_items(f, key, check=None, required=(), chunk_size=CHUNK_SIZE):
+    """Yield items of the array at key of the top-level JSON object in f.
+
+    Items are decoded one at a time so that memory does not depend on the
+    length of the array. When check is given, it is called with a dict of
+    other members before any item is yielded. Usually these are members
+    which precede the array. If a member named in required comes after the
+    array, items are kept until the end of the object and check is called
+    with all other members.
+    """
+    reader = _Reader(f, chunk_size)
+    header = {}
+    pending = None
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        raise ValueError(f"{key!r} not found in JSON stream")
+
+    found = False
+    while True:
+        name = reader.decode()
+        reader.expect(":")
+        if name == key and not found:
+            found = True
+            if all(k in header for k in required):
+                if check is not None:
+                    check(header)
+                yield from _iter_array(reader)
+            else:
+                pending = list(_iter_array(reader))
+        else:
+            value = reader.decode()
+            if pending is not None or not found:
+                header[name] = value
+
+        if reader.expect(",}") == "}":
+            break
+
+    if not found:
+        raise ValueError(f"{key!r} not found in JSON stream")
+
+    if pending is not None:
+        if check is not None:
+            check(header)
+        yield from pending
+
+
+def _iter_array(reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.expect("]")
+        return
+    while True:
+        yield reader.decode()
+        if reader.expect(",]") == "]":
+            return
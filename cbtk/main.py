@@ -1,57 +1,201 @@
 import argparse
-import dateutil.parser
+from concurrent.futures import ProcessPoolExecutor
+import functools
 import glob
+import heapq
+import itertools
 import json
 import os
 
 import jinja2
 
+from cbtk.archive import (SEGMENT_SUFFIX, load_segment, segment_files,
+                          write_segment)
+from cbtk.cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE, RecordCache
 from cbtk.core import Record, Runner, Suite
+from cbtk.filter import RecordFilter
+from cbtk.jsonstream import iter_items
+from cbtk.timestamp import parse_timestamp
+from cbtk.tracing import stage
+
+FORMAT_VERSION = "1.0.0"
 
 
 def sort_by_run_at(records):
     return sorted(records, key=lambda record: record.run_at)
 
 
-def load_file(filename):
-    records = []
+# Files larger than this are read by iter_file to avoid holding the whole
+# decoded document in memory.
+STREAM_THRESHOLD = 64 * 1024 * 1024
+
+
+def dict_to_record(raw):
+    values = {}
+    for name, dur in raw["duration"].items():
+        values[name] = {"duration": dur}
+
+    metadata = raw["metadata"]
+    runner = Runner.from_dict(metadata["runner"])
+    suite = Suite.from_dict(metadata["suite"])
+    run_at = parse_timestamp(metadata["run_at"])
 
-    def make_records(raw):
-        values = {}
-        for name, dur in raw["duration"].items():
-            values[name] = {"duration": dur}
+    return Record(suite=suite,
+                  runner=runner,
+                  run_at=run_at,
+                  hostname=metadata["hostname"],
+                  values=values)
 
-        metadata = raw["metadata"]
-        runner = Runner.from_dict(metadata["runner"])
-        suite = Suite.from_dict(metadata["suite"])
-        run_at = dateutil.parser.parse(metadata["run_at"])
 
-        return Record(suite=suite,
-                      runner=runner,
-                      run_at=run_at,
-                      hostname=metadata["hostname"],
-                      values=values)
+def check_format_version(dic):
+    version = dic.get("version")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported format version: {version}")
+
+
+def iter_file(filename, record_filter=None):
+    """Yield records in a file one at a time in the order of the file.
+
+    Only one record is decoded at a time when the format version precedes
+    records in the file as records_to_json writes. Otherwise records are
+    kept until the version is checked.
+    """
+    with open(filename) as f:
+        for raw in iter_items(f, "records", check_format_version,
+                              required=("version", )):
+            if record_filter is None or record_filter.match_raw(raw):
+                yield dict_to_record(raw)
+
+
+def load_file(filename, record_filter=None):
+    """Load records in a file sorted by run_at.
+
+    When record_filter is given, records which do not match are skipped
+    before they are built.
+    """
+    if os.fspath(filename).endswith(SEGMENT_SUFFIX):
+        return load_segment(filename, record_filter)
+
+    if os.path.getsize(filename) > STREAM_THRESHOLD:
+        return sort_by_run_at(iter_file(filename, record_filter))
 
     with open(filename) as f:
         dic = json.load(f)
-        assert dic["version"] == "1.0.0"
-        records += [make_records(raw) for raw in dic["records"]]
+        check_format_version(dic)
+        records = [
+            dict_to_record(raw) for raw in dic["records"]
+            if record_filter is None or record_filter.match_raw(raw)
+        ]
 
     return sort_by_run_at(records)
 
 
-def load_directory(directory):
-    filenames = glob.glob(os.path.join(directory, "**/*.json"), recursive=True)
-    return sort_by_run_at(
-        sum([load_file(filename) for filename in filenames], []))
+def load_file_cached(filename, cache, record_filter=None):
+    # cache has all records of a file to share it among filters
+    records = cache.load(filename, loader=load_file)
+    if record_filter is None:
+        return records
+    return [r for r in records if record_filter.match(r)]
+
+
+def merge_by_run_at(lists):
+    """Merge lists of records, each sorted by run_at, into one sorted list.
+
+    The merge is stable: records with the same run_at keep the order of
+    the lists they came from, which is what sort_by_run_at gives for the
+    concatenation of the lists.
+    """
+    return list(heapq.merge(*lists, key=lambda record: record.run_at))
+
+
+def load_files(filenames, jobs=1, cache=None, record_filter=None):
+    """Load files and return a list of records per file, in given order.
+
+    When jobs is not 1, files are parsed in a process pool. jobs <= 0 means
+    the number of CPUs. When cache is given, unchanged files are read from
+    the cache instead of being parsed.
+    """
+    if cache is not None:
+        loader = functools.partial(load_file_cached,
+                                   cache=cache,
+                                   record_filter=record_filter)
+    else:
+        loader = functools.partial(load_file, record_filter=record_filter)
 
+    if jobs == 1 or len(filenames) < 2:
+        return [loader(filename) for filename in filenames]
+
+    max_workers = jobs if jobs > 0 else os.cpu_count()
+    chunksize = max(1, len(filenames) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(loader, filenames, chunksize=chunksize))
+
+
+def find_result_files(directory):
+    """Return result files and segment files under directory.
+
+    Result files in a segment file are left out, because their records
+    are loaded from the segment.
+    """
+    filenames = []
+    for suffix in [".json", SEGMENT_SUFFIX]:
+        filenames += glob.glob(os.path.join(directory, "**/*" + suffix),
+                               recursive=True)
+
+    compacted = set()
+    for filename in filenames:
+        if filename.endswith(SEGMENT_SUFFIX):
+            compacted.update(segment_files(filename))
+    if not compacted:
+        return filenames
+    return [
+        f for f in filenames
+        if os.path.normpath(os.path.abspath(f)) not in compacted
+    ]
+
+
+def load_directory(directory, jobs=1, cache=None, record_filter=None):
+    filenames = find_result_files(directory)
+    return merge_by_run_at(
+        load_files(filenames, jobs, cache, record_filter))
+
+
+def make_cache(config):
+    if config.cache_dir is None:
+        return None
+
+    return RecordCache(config.cache_dir, FORMAT_VERSION,
+                       config.cache_max_size * 1024 * 1024)
+
+
+def list_files(config):
+    filenames = list(config.filenames)
+    if config.data_dir is not None:
+        filenames += find_result_files(config.data_dir)
+    return filenames
+
+
+def load_records(config, record_filter=None):
+    """Load records from files and the database given by config.
+
+    When record_filter is given, only matching records are loaded.
+    """
+    cache = make_cache(config)
 
-def load_records(config):
     records = []
+    if config.db is not None:
+        from cbtk.db import load_db
+        records += load_db(config.db, record_filter)
+
     if config.data_dir is not None:
-        records += load_directory(config.data_dir)
-    for filename in config.filenames:
-        records += load_file(filename)
+        records += load_directory(config.data_dir, config.jobs, cache,
+                                  record_filter)
+    records += itertools.chain.from_iterable(
+        load_files(config.filenames, config.jobs, cache, record_filter))
+
+    if cache is not None:
+        cache.prune()
+
     return records
 
 
@@ -79,7 +223,7 @@ def record_to_dict(record):
 def records_to_json(records):
     return json.dumps(
         {
-            "version": "1.0.0",
+            "version": FORMAT_VERSION,
             "records": [record_to_dict(r) for r in records]
         },
         indent=2)
@@ -90,8 +234,8 @@ def store_records(filename, records):
         f.write(records_to_json(records))
 
 
-def cmd_publish(args):
-
+def prepare_site(args):
+    """Fill defaults of site options and return a jinja environment."""
     if args.resource_dir is None:
         import cbtk.www
         args.resource_dir = cbtk.www.__path__[0]
@@ -102,63 +246,541 @@ def cmd_publish(args):
     if args.runner_display_order is not None:
         args.runner_display_order = args.runner_display_order.split(",")
 
-    records = load_records(args)
+    return make_env(args)
 
-    # Since some pages does not hostname-aware, filter by a hostname.
-    records = [r for r in records if r.hostname == args.hostname]
 
-    env = jinja2.Environment(loader=jinja2.FileSystemLoader(
+def make_env(args):
+    # compiled templates are kept with cached records
+    bytecode_cache = None
+    if args.cache_dir is not None:
+        directory = os.path.join(args.cache_dir, "templates")
+        os.makedirs(directory, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(directory)
+
+    return jinja2.Environment(loader=jinja2.FileSystemLoader(
         os.path.join(args.resource_dir, "templates")),
-                             autoescape=jinja2.select_autoescape())
+                              autoescape=jinja2.select_autoescape(),
+                              bytecode_cache=bytecode_cache)
+
+
+# options which do not change published files
+NON_INPUT_OPTIONS = ("func", "jobs", "cache_dir", "cache_max_size",
+                     "incremental", "profile", "trace", "cprofile")
+
+
+def digest_options(args):
+    """Return a digest of options which change the contents of a site."""
+    from cbtk.manifest import digest_bytes
+
+    options = {
+        k: v
+        for k, v in sorted(vars(args).items()) if k not in NON_INPUT_OPTIONS
+    }
+    return digest_bytes(repr(options).encode())
+
+
+def digest_inputs(args):
+    """Return a digest of options, input files and resources of a site.
+
+    Files are identified by their size and mtime as the record cache does,
+    so that unchanged inputs are found without loading them.
+    """
+    from cbtk.manifest import new_digest
+
+    h = new_digest()
+    h.update(digest_options(args).encode())
+
+    filenames = list_files(args)
+    if args.db is not None:
+        filenames += [args.db]
+    for dirpath, _, names in os.walk(args.resource_dir):
+        filenames += [os.path.join(dirpath, name) for name in names]
+
+    for filename in sorted(filenames):
+        st = os.stat(filename)
+        h.update(f"{filename}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
 
-    output_dir = args.output
+def is_published(args, inputs):
+    """Return whether the output has been published from the same inputs
+    and has not been touched since."""
+    from cbtk.manifest import Manifest
 
+    dirs = [args.output]
+    if args.all_hosts:
+        dirs += [
+            os.path.dirname(path) for path in glob.glob(
+                os.path.join(args.output, "*", Manifest.FILENAME))
+        ]
+    return all(Manifest(d).is_unchanged(inputs) for d in dirs)
+
+
+def publish(args):
+    if args.all_hosts == (args.hostname is not None):
+        raise SystemExit("publish requires either --hostname or --all-hosts")
+
+    env = prepare_site(args)
+    if not os.path.exists(args.output):
+        os.mkdir(args.output)
+
+    # Publishing is skipped only when no input changed. Otherwise data of
+    # suites whose records did not change are taken from fragments of the
+    # last publish (see cbtk.pages.fragments).
+    inputs = None
+    if args.incremental:
+        inputs = digest_inputs(args)
+        if is_published(args, inputs):
+            print("inputs have not changed since the last publish")
+            return
+
+    # Since some pages does not hostname-aware, filter by a hostname.
+    # Filters are checked by the loaders, so "load" includes them.
+    with stage("load"):
+        records = load_records(args, RecordFilter.from_config(args))
+
+    if args.all_hosts:
+        publish_all_hosts(args, env, records, inputs)
+        return
+
+    publish_site(args, env, records, args.output, inputs)
+
+
+def publish_host(args, records, dirname, inputs=None):
+    """Publish records of args.hostname under the output/dirname."""
+    publish_site(args, make_env(args), records,
+                 os.path.join(args.output, dirname), inputs)
+
+
+def publish_all_hosts(args, env, records, inputs=None):
+    """Publish a site per host under output/<host> and an index of them.
+
+    Hosts are published in parallel by args.jobs processes.
+    """
+    from cbtk.core import groupby
+    from cbtk.pages import Link, PageMaker, make_dirnames
+    from cbtk.parallel import get_executor
+
+    groups = groupby([r for r in records if r.hostname is not None],
+                     key=lambda r: r.hostname)
+    dirnames = make_dirnames(groups.keys())
+
+    parallel = args.jobs != 1 and len(groups) > 1
+
+    host_args = []
+    for hostname, dirname in zip(groups, dirnames):
+        host_args += [argparse.Namespace(
+            **{**vars(args),
+               "hostname": hostname,
+               "base_url": f"{args.base_url}/{dirname}",
+               # a worker does not make a pool of its own
+               "jobs": 1 if parallel else args.jobs})]
+
+    with stage("hosts"):
+        if not parallel:
+            for a, lst, dirname in zip(host_args, groups.values(), dirnames):
+                publish_host(a, lst, dirname, inputs)
+        else:
+            executor = get_executor(args.jobs)
+            # raise an exception of a host if any
+            list(executor.map(publish_host, host_args, groups.values(),
+                              dirnames, itertools.repeat(inputs)))
+
+    hosts = [
+        Link(title=hostname, href=f"{dirname}/")
+        for hostname, dirname in zip(groups, dirnames)
+    ]
+    manifest = None
+    if args.incremental:
+        from cbtk.manifest import Manifest
+        manifest = Manifest(args.output)
+
+    maker = PageMaker("", env, args.output, manifest)
+    maker.copy_file(args, "output.css")
+    # the index has no pages of a host
+    maker.write_page("index.html", args, title="Hosts",
+                     contents_template="hosts/index.html", hosts=hosts,
+                     site_nav=[Link("Hosts", "")])
+
+    if manifest is not None:
+        manifest.set_inputs(inputs)
+        manifest.save()
+
+
+def publish_site(args, env, records, output_dir, inputs=None):
     if not os.path.exists(output_dir):
         os.mkdir(output_dir)
 
+    manifest = None
+    if args.incremental:
+        from cbtk.manifest import Manifest
+        manifest = Manifest(output_dir)
+
+    assets = None
+    if args.fingerprint:
+        from cbtk.assets import Assets
+        assets = Assets(output_dir)
+
+    # grouping of records and speedup matrices are shared by pages
+    from cbtk.index import RecordIndex
+    with stage("index"):
+        index = RecordIndex(records)
+
+    # data of a suite depends only on its records and options, so suites
+    # whose records did not change are not made again
+    fragments = None
+    if manifest is not None and len(index.hostnames) <= 1:
+        from cbtk.pages.fragments import SuiteFragments
+        fragments = SuiteFragments(output_dir, index, digest_options(args))
+
     from cbtk.pages import PageMaker
-    maker = PageMaker("", env, output_dir)
+    maker = PageMaker("", env, output_dir, manifest, assets)
     maker.copy_file(args, "output.css")
 
     print("making home page...")
     from cbtk.pages import make_home_page
-    make_home_page("", env, output_dir, args, records)
+    with stage("home_page"):
+        make_home_page("", env, output_dir, args, records, manifest, assets,
+                       index, fragments)
 
     print("making timeline page...")
     from cbtk.pages import make_timeline_page
-    make_timeline_page("timeline", env, output_dir, args, records)
+    with stage("timeline_page"):
+        make_timeline_page("timeline", env, output_dir, args, records,
+                           manifest, assets, index, fragments)
 
     print("making runner page...")
     from cbtk.pages import make_runners_page
-    make_runners_page("runners", env, output_dir, args, records)
+    with stage("runners_page"):
+        make_runners_page("runners", env, output_dir, args, records,
+                          manifest, assets, index, fragments)
 
+    if assets is not None:
+        assets.prune(manifest)
 
-def main():
+    if fragments is not None:
+        fragments.prune()
+
+    if manifest is not None:
+        manifest.set_inputs(inputs)
+        manifest.save()
+
+
+def cmd_publish(args):
+    if not (args.profile or args.trace or args.cprofile):
+        publish(args)
+        return
+
+    import cbtk.tracing
+    tracer = cbtk.tracing.start()
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        with stage("publish"):
+            publish(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        cbtk.tracing.stop()
+
+    if args.profile:
+        cbtk.tracing.print_summary(tracer)
+    if args.trace:
+        cbtk.tracing.store_trace(args.trace, tracer)
+
+
+def cmd_watch(args):
+    from cbtk.watch import Site, watch
+
+    if args.all_hosts or args.hostname is None:
+        raise SystemExit("watch requires --hostname")
+
+    env = prepare_site(args)
+    if not os.path.exists(args.output):
+        os.mkdir(args.output)
+    record_filter = RecordFilter.from_config(args)
+    cache = make_cache(args)
+
+    def load_db(path):
+        from cbtk.db import load_db
+        return load_db(path, record_filter)
+
+    site = Site(
+        args, lambda filenames: load_files(filenames, args.jobs, cache,
+                                           record_filter), load_db)
+    try:
+        watch(args, env, site, lambda: list_files(args), args.interval,
+              args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_serve(args):
+    import datetime
+    from cbtk.serve import Views, make_server
+
+    env = prepare_site(args)
+    # hostname is given by the query of each request
+    record_filter = RecordFilter.from_config(args)
+    record_filter.hostname = None
+    # records are kept only in the table of views
+    views = Views(args, env, load_records(args, record_filter),
+                  args.cache_entries)
+    generated_at = datetime.datetime.now().strftime("%c")
+    server = make_server((args.bind, args.port), views, generated_at)
+    print(f"serving {len(views.table)} records on "
+          f"http://{args.bind}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def cmd_compact(args):
+    # files in the segment, which may be in --data-dir, are not listed
+    filenames = [
+        f for f in list_files(args)
+        if not f.endswith(SEGMENT_SUFFIX)
+        and os.path.abspath(f) != os.path.abspath(args.output)
+    ]
+    if os.path.exists(args.output):
+        compacted = set(segment_files(args.output))
+        filenames = [
+            f for f in filenames
+            if os.path.normpath(os.path.abspath(f)) not in compacted
+        ]
+    if not filenames:
+        print(f"no new result files for {args.output}")
+        return
+
+    record_filter = RecordFilter.from_config(args)
+    records = merge_by_run_at(
+        load_files(filenames, args.jobs, make_cache(args), record_filter))
+    write_segment(args.output, records, filenames, append=True)
+    print(f"appended {len(records)} records of {len(filenames)} files "
+          f"to {args.output}")
+
+
+def cmd_ingest(args):
+    if args.db is None:
+        raise SystemExit("ingest requires --db")
+
+    from cbtk.db import ingest
+    count = ingest(args.db, list_files(args),
+                   lambda filenames: load_files(filenames, args.jobs))
+    print(f"ingested {count} files into {args.db}")
+
+
+def cmd_regressions(args):
+    from cbtk.pages.timeline import make_timeline_series
+    from cbtk.regression import (load_state, oldest_last_run_at,
+                                 store_state, update_changes)
+    from cbtk.timestamp import to_aware
+
+    state = load_state(args.state) if args.state else {}
+    record_filter = RecordFilter.from_config(args)
+    # records scanned by the last run are not loaded
+    since = oldest_last_run_at(state)
+    if since is not None and (record_filter.since is None
+                              or to_aware(record_filter.since) < since):
+        record_filter.since = since
+
+    records = load_records(args, record_filter)
+    update_changes(make_timeline_series(records), state)
+    if args.state:
+        store_state(args.state, state)
+
+    # series without new records have changes only in state
+    for key, entry in state.items():
+        for c in entry["detector"]["changes"]:
+            print(f"{key:60} {c['version']:24} {c['run_at']:32} "
+                  f"{c['magnitude']:+.1%}")
+
+
+def cmd_export(args):
+    records = sort_by_run_at(
+        load_records(args, RecordFilter.from_config(args)))
+    store_records(args.output, records)
+    print(f"wrote {len(records)} records to {args.output}")
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser()
 
     parent_parser = argparse.ArgumentParser()
     parent_parser.add_argument("filenames", nargs="*")
     parent_parser.add_argument("-d", "--data-dir", default=None)
+    parent_parser.add_argument("-j", "--jobs", type=int, default=1,
+                               help="number of processes to load files "
+                               "(0 means the number of CPUs)")
+    parent_parser.add_argument("--cache-dir", nargs="?", default=None,
+                               const=DEFAULT_CACHE_DIR,
+                               help="cache parsed records in this directory "
+                               f"(default: {DEFAULT_CACHE_DIR})")
+    parent_parser.add_argument("--cache-max-size", type=int,
+                               default=DEFAULT_MAX_SIZE // (1024 * 1024),
+                               help="maximum size of the cache in MB")
+    parent_parser.add_argument("--db", default=None,
+                               help="SQLite database made by ingest")
+
+    filter_parser = argparse.ArgumentParser(add_help=False)
+    filter_parser.add_argument("--suite", action="append", default=None,
+                               help="glob of suite names to load "
+                               "(can be repeated)")
+    filter_parser.add_argument("--suite-tags", default=None,
+                               help="glob of suite tags to load")
+    filter_parser.add_argument("--runner", action="append", default=None,
+                               help="glob of runner names to load "
+                               "(can be repeated)")
+    filter_parser.add_argument("--min-version", default=None,
+                               help="oldest runner version to load")
+    filter_parser.add_argument("--max-version", default=None,
+                               help="newest runner version to load")
+    filter_parser.add_argument("--since", default=None,
+                               help="load records run at or after this time")
+    filter_parser.add_argument("--until", default=None,
+                               help="load records run at or before this time")
 
     subparsers = parser.add_subparsers(title="command",
                                        metavar="command",
                                        required=True,
                                        dest="command")
 
-    publish_parser = subparsers.add_parser(name="publish",
-                                           parents=[parent_parser],
-                                           add_help=False)
-    publish_parser.add_argument("-r", "--resource-dir", default=None)
-    publish_parser.add_argument("-o", "--output", default="public")
-    publish_parser.add_argument("-b", "--base-url", default="")
-    publish_parser.add_argument("--runner-order", default=None)
-    publish_parser.add_argument("--runner-display-order", default=None)
-    publish_parser.add_argument("--title", default="Benchmark")
-    publish_parser.add_argument("--geomean", action="store_true")
-    publish_parser.add_argument("--hostname", default=None, required=True)
+    # options of pages
+    site_parser = argparse.ArgumentParser(add_help=False)
+    site_parser.add_argument("-r", "--resource-dir", default=None)
+    site_parser.add_argument("-b", "--base-url", default="")
+    site_parser.add_argument("--runner-order", default=None)
+    site_parser.add_argument("--runner-display-order", default=None)
+    site_parser.add_argument("--title", default="Benchmark")
+    site_parser.add_argument("--geomean", action="store_true")
+    site_parser.add_argument("--compact-timeline", action="store_true",
+                             help="encode timeline points as arrays "
+                             "without indentation")
+    site_parser.add_argument("--compact-json", action="store_true",
+                             help="write data.json without indentation")
+    site_parser.add_argument("--timeline-points", type=int, default=0,
+                             help="downsample timeline thumbnails to "
+                             "about this number of points per series")
+    site_parser.add_argument("--timeline-detail-points", type=int,
+                             default=0,
+                             help="downsample the single chart view to "
+                             "about this number of points per series "
+                             "(0 means the same points as thumbnails)")
+    site_parser.add_argument("--show-regressions", action="store_true",
+                             help="mark change points on timeline charts")
+
+    # options of a site written to a directory
+    output_parser = argparse.ArgumentParser(add_help=False)
+    output_parser.add_argument("-o", "--output", default="public")
+    output_parser.add_argument("--hostname", default=None)
+    output_parser.add_argument("--all-hosts", action="store_true",
+                               help="publish a site of each host under "
+                               "OUTPUT/HOST with an index of hosts")
+    output_parser.add_argument("--split-timeline", action="store_true",
+                               help="make one timeline page and data.json "
+                               "per suite")
+    output_parser.add_argument("--fingerprint", action="store_true",
+                               help="name scripts, styles and data.json "
+                               "by content hash and write .gz and .br "
+                               "files of them")
+
+    publish_parser = subparsers.add_parser(
+        name="publish",
+        parents=[parent_parser, filter_parser, site_parser, output_parser],
+        add_help=False)
+    publish_parser.add_argument("--incremental", action="store_true",
+                                help="skip publishing when no input file, "
+                                "option or resource changed since the last "
+                                "publish, and otherwise make data only of "
+                                "suites whose records changed and rewrite "
+                                "only files whose contents changed")
+    publish_parser.add_argument("--profile", action="store_true",
+                                help="print wall time, CPU time and peak "
+                                "memory of each stage")
+    publish_parser.add_argument("--trace", default=None,
+                                help="write a JSON trace of stages to this "
+                                "file")
+    publish_parser.add_argument("--cprofile", default=None,
+                                help="write cProfile stats to this file")
     publish_parser.set_defaults(func=cmd_publish)
 
-    args = parser.parse_args()
+    watch_parser = subparsers.add_parser(
+        name="watch",
+        parents=[parent_parser, filter_parser, site_parser, output_parser],
+        add_help=False,
+        help="republish whenever result files are added or changed")
+    watch_parser.add_argument("--interval", type=float, default=2.0,
+                              help="seconds between scans of files")
+    watch_parser.add_argument("--once", action="store_true",
+                              help="publish once and exit")
+    watch_parser.set_defaults(func=cmd_watch)
+
+    serve_parser = subparsers.add_parser(
+        name="serve",
+        parents=[parent_parser, filter_parser, site_parser],
+        add_help=False,
+        help="serve pages made on request")
+    serve_parser.add_argument("--hostname", default=None,
+                              help="host of timeline and runners pages "
+                              "without ?host= (default: the first one)")
+    serve_parser.add_argument("--bind", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--cache-entries", type=int, default=256,
+                              help="number of pages kept in memory")
+    serve_parser.add_argument("--split-timeline", action="store_true",
+                              help="make one timeline page and data.json "
+                              "per suite")
+    serve_parser.set_defaults(func=cmd_serve)
+
+    compact_parser = subparsers.add_parser(
+        name="compact",
+        parents=[parent_parser, filter_parser],
+        add_help=False,
+        help="append result files which are not in a segment file yet "
+        "to it")
+    compact_parser.add_argument("-o", "--output", required=True,
+                                help=f"segment file (*{SEGMENT_SUFFIX}), "
+                                "which may be in --data-dir")
+    compact_parser.add_argument("--hostname", default=None)
+    compact_parser.set_defaults(func=cmd_compact)
+
+    ingest_parser = subparsers.add_parser(
+        name="ingest",
+        parents=[parent_parser],
+        add_help=False,
+        help="insert new or changed result files into --db")
+    ingest_parser.set_defaults(func=cmd_ingest)
+
+    regressions_parser = subparsers.add_parser(
+        name="regressions",
+        parents=[parent_parser, filter_parser],
+        add_help=False,
+        help="detect step changes of durations in timeline series")
+    regressions_parser.add_argument("--hostname", default=None)
+    regressions_parser.add_argument(
+        "--state",
+        default=None,
+        help="file to keep detector state between runs so that only "
+        "results newer than the last run are loaded and scanned")
+    regressions_parser.set_defaults(func=cmd_regressions)
+
+    export_parser = subparsers.add_parser(
+        name="export",
+        parents=[parent_parser, filter_parser],
+        add_help=False,
+        help="convert result files and segments into a JSON result file")
+    export_parser.add_argument("-o", "--output", required=True)
+    export_parser.add_argument("--hostname", default=None)
+    export_parser.set_defaults(func=cmd_export)
+
+    args = parser.parse_args(argv)
     args.func(args)
 
 
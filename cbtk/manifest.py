@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+
+
+def new_digest():
+    """Return a hash object whose hexdigest is the digest of a manifest."""
+    return hashlib.sha256()
+
+
+def digest_bytes(data):
+    h = new_digest()
+    h.update(data)
+    return h.hexdigest()
+
+
+def digest_file(path):
+    h = new_digest()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Manifest:
+    """Content digests of files generated in an output directory.
+
+    A file is fresh when its digest is the same as the one recorded by the
+    last publish and the file on disk has not been touched since, i.e. its
+    size and mtime are also the same. Fresh files are not rewritten.
+
+    The digest of inputs of the last publish is also recorded, so that
+    nothing is made again when inputs have not changed and all files are
+    intact.
+    """
+
+    FILENAME = ".cbtk-manifest.json"
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self.entries = {}
+        self.inputs = None
+        self.modified = False
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                dic = json.load(f)
+            self.entries = dic.get("files", {})
+            self.inputs = dic.get("inputs")
+
+    def _key(self, path):
+        return os.path.relpath(path, self.output_dir).replace(os.sep, "/")
+
+    def _is_intact(self, path, entry):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        return (entry["size"], entry["mtime_ns"]) == (st.st_size,
+                                                     st.st_mtime_ns)
+
+    def is_fresh(self, path, digest):
+        entry = self.entries.get(self._key(path))
+        if entry is None or entry["digest"] != digest:
+            return False
+        return self._is_intact(path, entry)
+
+    def is_unchanged(self, inputs):
+        """Return whether inputs are the same as the last publish and no
+        file has been touched since."""
+        if inputs is None or inputs != self.inputs:
+            return False
+        return all(
+            self._is_intact(os.path.join(self.output_dir, key), entry)
+            for key, entry in self.entries.items())
+
+    def remove(self, path):
+        if self.entries.pop(self._key(path), None) is not None:
+            self.modified = True
+
+    def set_inputs(self, inputs):
+        if inputs != self.inputs:
+            self.inputs = inputs
+            self.modified = True
+
+    def update(self, path, digest):
+        st = os.stat(path)
+        self.entries[self._key(path)] = {
+            "digest": digest,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        self.modified = True
+
+    def save(self):
+        if not self.modified:
+            return
+        with open(self.path, "w") as f:
+            json.dump({"inputs": self.inputs, "files": self.entries}, f,
+                      indent=2, sort_keys=True)
@@ -1,14 +1,38 @@
+from collections import namedtuple
 import datetime
 import os
+import re
 import shutil
 
+from cbtk.assets import fingerprint_name
+from cbtk.manifest import digest_bytes, digest_file, new_digest
+from cbtk.tracing import stage
+
+# generated_at is rendered as this placeholder and replaced when a page is
+# written, so that the digest of a page does not depend on the time.
+GENERATED_AT = "@@cbtk-generated-at@@"
+
+# number of template outputs joined into a chunk written by write_page
+STREAM_BUFFER = 64
+
+Link = namedtuple("Link", ["title", "href"])
+
+# links of the site navigation relative to base_url
+SITE_NAV = [
+    Link("Home", ""),
+    Link("Timeline", "timeline/"),
+    Link("Runners", "runners/"),
+]
+
 
 class PageMaker:
 
-    def __init__(self, path, env, output_dir):
+    def __init__(self, path, env, output_dir, manifest=None, assets=None):
         self.path = path
         self.env = env
         self.base_dir = os.path.join(output_dir, path)
+        self.manifest = manifest
+        self.assets = assets
         os.makedirs(self.base_dir, exist_ok=True)
 
     def get_template(self, name):
@@ -17,42 +41,168 @@ class PageMaker:
     def copy_file(self, config, src_file, dest_file=None):
         src = os.path.join(config.resource_dir, src_file)
         dst = os.path.join(self.base_dir, dest_file or src_file)
-        shutil.copy(src, dst)
+        with stage("write"):
+            if self.assets is not None:
+                digest = digest_file(src)
+                hashed = fingerprint_name(dst, digest)
+                if not os.path.exists(hashed):
+                    shutil.copy(src, hashed)
+                self.assets.add(dst, hashed)
+                if self.manifest is not None:
+                    self.manifest.update(hashed, digest)
+                return
+
+            if self.manifest is None:
+                shutil.copy(src, dst)
+                return
+
+            digest = digest_file(src)
+            if not self.manifest.is_fresh(dst, digest):
+                shutil.copy(src, dst)
+                self.manifest.update(dst, digest)
 
     def render(self, template_filename, config, **kwargs):
+        with stage("render"):
+            template = self.get_template(template_filename)
+            return template.render(**self._extras(config, kwargs))
+
+    def render_page(self, config, **kwargs):
+        return self.render("index.html", config, **kwargs)
+
+    def asset_url(self, url):
+        """Return url of a file relative to this page, which is
+        fingerprinted when assets are."""
+        if self.assets is None:
+            return url
+        return self.assets.url(self.base_dir, url)
+
+    def _extras(self, config, kwargs):
+        stylesheet = "output.css"
+        if self.assets is not None:
+            stylesheet = self.assets.root_url(stylesheet)
         extras = {
             "site_title": config.title,
             "base_url": config.base_url,
-            "generated_at": datetime.datetime.now().strftime("%c"),
+            "generated_at": GENERATED_AT,
+            "stylesheet": stylesheet,
+            "site_nav": SITE_NAV,
         }
-
         extras.update(kwargs)
-
-        template = self.get_template(template_filename)
-        return template.render(**extras)
-
-    def render_page(self, config, **kwargs):
-        return self.render("index.html", config, **kwargs)
+        return extras
+
+    def write_page(self, filename, config, **kwargs):
+        """Render index.html and write it to filename chunk by chunk.
+
+        The body of a page can be given by contents_template, which is
+        included by index.html, instead of contents rendered in advance.
+        """
+        with stage("render"):
+            stream = self.get_template("index.html").stream(
+                **self._extras(config, kwargs))
+            # a buffered chunk joins whole outputs of a template, so that
+            # the placeholder of generated_at is not split.
+            stream.enable_buffering(STREAM_BUFFER)
+            self.write_stream(filename, stream)
+
+    def write_stream(self, filename, chunks, fingerprint=False):
+        """Write an iterable of strings to filename.
+
+        Chunks are written to a temporary file as they come, which replaces
+        filename only when its contents changed. When fingerprint is true
+        and assets are given, the file is named by its digest instead.
+        """
+        path = os.path.join(self.base_dir, filename)
+        tmp = path + ".tmp"
+        generated_at = datetime.datetime.now().strftime("%c")
+        h = new_digest()
+        with open(tmp, "w") as f:
+            for chunk in chunks:
+                h.update(chunk.encode())
+                f.write(chunk.replace(GENERATED_AT, generated_at))
+
+        digest = h.hexdigest()
+        if fingerprint and self.assets is not None:
+            hashed = fingerprint_name(path, digest)
+            if os.path.exists(hashed):
+                os.unlink(tmp)
+            else:
+                os.replace(tmp, hashed)
+            self.assets.add(path, hashed)
+            if self.manifest is not None:
+                self.manifest.update(hashed, digest)
+            return
+
+        if self.manifest is not None and self.manifest.is_fresh(
+                path, digest):
+            os.unlink(tmp)
+            return
+
+        os.replace(tmp, path)
+        if self.manifest is not None:
+            self.manifest.update(path, digest)
 
     def write(self, filename, contents):
+        with stage("write"):
+            self._write(filename, contents)
+
+    def _write(self, filename, contents):
         path = os.path.join(self.base_dir, filename)
-        with open(path, "w") as f:
-            f.write(contents)
+        if self.manifest is not None:
+            digest = digest_bytes(contents.encode())
+            if self.manifest.is_fresh(path, digest):
+                return
 
-    def subpage(self, path):
-        return PageMaker(path, self.env, self.base_dir)
+        generated_at = datetime.datetime.now().strftime("%c")
+        with open(path, "w") as f:
+            f.write(contents.replace(GENERATED_AT, generated_at))
 
+        if self.manifest is not None:
+            self.manifest.update(path, digest)
 
-def make_home_page(path, env, output_dir, configs, records):
+    def subpage(self, path):
+        return PageMaker(path, self.env, self.base_dir, self.manifest,
+                         self.assets)
+
+
+def make_dirnames(names):
+    """Return directory names of names which are safe as a path."""
+    dirnames = []
+    used = set()
+    for i, name in enumerate(names):
+        dirname = re.sub(r"[^A-Za-z0-9._-]+", "_", str(name))
+        if dirname.strip(".") == "":
+            dirname = "_" + dirname
+        suffix = i
+        base = dirname
+        while dirname in used:
+            dirname = f"{base}-{suffix}"
+            suffix += 1
+        used.add(dirname)
+        dirnames += [dirname]
+    return dirnames
+
+
+def make_home_page(path, env, output_dir, configs, records, manifest=None,
+                   assets=None, index=None, fragments=None):
     from cbtk.pages.home import make_page
-    make_page(PageMaker(path, env, output_dir), configs, records)
+    shown = make_page(PageMaker(path, env, output_dir, manifest, assets),
+                      configs, records, index=index, fragments=fragments)
+    for lines in shown.values():
+        for line in lines:
+            print(line)
 
 
-def make_timeline_page(path, env, output_dir, configs, records):
+def make_timeline_page(path, env, output_dir, configs, records,
+                       manifest=None, assets=None, index=None,
+                       fragments=None):
     from cbtk.pages.timeline import make_page
-    make_page(PageMaker(path, env, output_dir), configs, records)
+    make_page(PageMaker(path, env, output_dir, manifest, assets), configs,
+              records, index=index, fragments=fragments)
 
 
-def make_runners_page(path, env, output_dir, configs, records):
+def make_runners_page(path, env, output_dir, configs, records,
+                      manifest=None, assets=None, index=None,
+                      fragments=None):
     from cbtk.pages.runners import make_page
-    make_page(PageMaker(path, env, output_dir), configs, records)
+    make_page(PageMaker(path, env, output_dir, manifest, assets), configs,
+              records, index=index, fragments=fragments)
@@ -0,0 +1,94 @@
+"""Data of pages made per suite and kept between publishes.
+
+With --incremental, the timeline charts, the runners chart and the home
+table of a suite are stored in DIRNAME of the output directory, named by a
+digest of options and records of the suite. Pages of a suite whose digest
+is found are made from the stored data, so a publish after new results of
+a suite makes charts and speedup matrices of that suite only.
+"""
+import json
+import os
+
+from cbtk.manifest import new_digest
+from cbtk.speedup import make_speedup_matrices
+
+DIRNAME = ".cbtk-fragments"
+
+
+def digest_records(options_digest, records):
+    """Return a digest of options and of durations of records."""
+    h = new_digest()
+    h.update(options_digest.encode())
+    for r in records:
+        h.update(repr((r.hostname, r.runner.longname, r.run_at.isoformat(),
+                       r.get_values_by_metric("duration"))).encode())
+    return h.hexdigest()
+
+
+class SuiteFragments:
+    """Data of pages of suites of a RecordIndex in an output directory.
+
+    A fragment is a JSON value of a page and a suite. Fragments which are
+    neither read nor written by a publish are removed by prune.
+    """
+
+    def __init__(self, output_dir, index, options_digest):
+        self.directory = os.path.join(output_dir, DIRNAME)
+        self.index = index
+        self.digests = {
+            suite: digest_records(options_digest, records)
+            for suite, records in index.by_suite.items()
+        }
+        self._used = set()
+        self._matrices = {}
+
+    @property
+    def suites(self):
+        return list(self.digests)
+
+    def _path(self, page, suite):
+        return os.path.join(self.directory,
+                            f"{page}-{self.digests[suite]}.json")
+
+    def get(self, page, suite):
+        """Return the fragment of page and suite, or None."""
+        path = self._path(page, suite)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return None
+        self._used.add(path)
+        return value
+
+    def put(self, page, suite, value):
+        path = self._path(page, suite)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(value, f)
+        self._used.add(path)
+
+    def records(self, suites):
+        """Return records of suites, each sorted by run_at."""
+        return [r for suite in suites for r in self.index.by_suite[suite]]
+
+    def speedup_matrices(self, config, suites):
+        """Return speedup matrices of suites. Matrices are made once and
+        shared by pages."""
+        missing = [s for s in suites if s not in self._matrices]
+        if missing:
+            self._matrices.update(
+                make_speedup_matrices(self.records(missing), config))
+        return {s: self._matrices[s] for s in suites if s in self._matrices}
+
+    def prune(self):
+        """Remove fragments which were not used. Returns removed files."""
+        removed = []
+        if not os.path.isdir(self.directory):
+            return removed
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path not in self._used:
+                os.unlink(path)
+                removed += [path]
+        return removed
@@ -4,8 +4,11 @@ import functools
 from cbtk.core import groupby
 from cbtk.speedup import make_speedup_matrices, SpeedupMatrix
 
+Table = namedtuple("Table", ["caption", "header", "rows"])
 
-def print_speedups(matrix):
+
+def format_speedups(matrix):
+    lines = []
     for suite in matrix:
         runners = matrix[suite].runners()
         for r0 in runners:
@@ -13,9 +16,11 @@ def print_speedups(matrix):
                 record = matrix[suite].get(r0, r1)
                 speedups = record.get_values_by_metric("_speedup")
                 average = speedups["_average"]
-                print(
+                lines += [
                     f"{str(suite):20} {r0.longname:40} -> {r1.longname:40}: "
-                    f"{average:.3}")
+                    f"{average:.3}"
+                ]
+    return lines
 
 
 def get_oldest(records):
@@ -35,8 +40,6 @@ def get_latest(records):
 
 
 def convert_to_table(suite, matrix):
-    Table = namedtuple("Table", ["caption", "header", "rows"])
-
     def fmt_runner(runner):
         name = [f"{runner.name}-{runner.version}"]
         if runner.tags:
@@ -57,7 +60,7 @@ def convert_to_table(suite, matrix):
     return Table(caption=str(suite), header=header, rows=rows)
 
 
-def make_host_section(config, hostname, records, matrix):
+def make_host_section(config, hostname, records, tables):
     Section = namedtuple(
         "Data",
         ["hostname", "latest_run_at", "oldest_run_at", "num_runs", "tables"])
@@ -65,8 +68,6 @@ def make_host_section(config, hostname, records, matrix):
     oldest = get_oldest(records)
     latest = get_latest(records)
 
-    tables = [convert_to_table(k, v) for k, v in matrix.items()]
-
     return Section(hostname=hostname,
                    latest_run_at=latest.run_at.strftime("%c"),
                    oldest_run_at=oldest.run_at.strftime("%c"),
@@ -75,16 +76,12 @@ def make_host_section(config, hostname, records, matrix):
 
 
 def make_html(maker, config, sections):
-    home_template = maker.get_template("home.html")
-    contents = home_template.render(sections=sections)
-
-    data = {
+    return {
         "title": "Home",
-        "contents": contents,
+        "contents_template": "home.html",
+        "sections": sections,
     }
 
-    return maker.render_page(config, **data)
-
 
 def drop_older_patch(runners):
     dropped = []
@@ -108,16 +105,72 @@ def drop_patch(matrix):
     return dropped
 
 
-def make_page(maker, config, records):
-    groups = groupby(records, key=lambda r: r.hostname)
+def make_tables_from_fragments(config, fragments):
+    """Return tables and speedup lines of suites, making speedup matrices
+    only of suites which have no fragment."""
+    cached = {suite: fragments.get("home", suite)
+              for suite in fragments.suites}
+    stale = [suite for suite, value in cached.items() if value is None]
+    matrices = {
+        k: drop_patch(v)
+        for k, v in fragments.speedup_matrices(config, stale).items()
+    }
+
+    tables = []
+    lines = []
+    for suite, value in cached.items():
+        if value is None:
+            value = {"table": None, "speedups": []}
+            if suite in matrices:
+                value["table"] = convert_to_table(suite, matrices[suite])
+                value["speedups"] = format_speedups(
+                    {suite: matrices[suite]})
+            fragments.put("home", suite, value)
+        if value["table"] is not None:
+            tables += [Table(*value["table"])]
+        lines += value["speedups"]
+
+    return tables, lines
+
+
+def make_page(maker, config, records, matrices_by_host=None, index=None,
+              fragments=None):
+    """Make the home page and return speedups on it by hostname, formatted
+    as lines by format_speedups.
+
+    matrices_by_host maps a hostname to speedup matrices of its records
+    which have been made already. index is a RecordIndex of records.
+    fragments is a SuiteFragments of the records of a single host.
+    """
+    if index is not None:
+        groups = index.by_host
+    else:
+        groups = groupby(records, key=lambda r: r.hostname)
 
     sections = []
+    shown = {}
     for hostname in groups:
-        matrices = make_speedup_matrices(groups[hostname], config)
+        if fragments is not None:
+            tables, shown[hostname] = make_tables_from_fragments(
+                config, fragments)
+            sections += [
+                make_host_section(config, hostname, groups[hostname], tables)
+            ]
+            continue
+
+        if matrices_by_host is not None:
+            matrices = matrices_by_host[hostname]
+        elif index is not None:
+            matrices = index.speedup_matrices(config, hostname)
+        else:
+            matrices = make_speedup_matrices(groups[hostname], config)
         matrices = {k: drop_patch(v) for k, v in matrices.items()}
-        print_speedups(matrices)
+        shown[hostname] = format_speedups(matrices)
+        tables = [convert_to_table(k, v) for k, v in matrices.items()]
         section = make_host_section(config, hostname, groups[hostname],
-                                    matrices)
+                                    tables)
         sections += [section]
 
-    maker.write("index.html", make_html(maker, config, sections))
+    maker.write_page("index.html", config,
+                     **make_html(maker, config, sections))
+    return shown
@@ -1,9 +1,11 @@
 from collections import defaultdict, namedtuple
-import json
+from operator import attrgetter
 from typing import List, Optional
 
 from cbtk.core import Record
+from cbtk.jsonstream import RawJSON, encode, iter_encode_array
 from cbtk.speedup import make_speedup_matrices
+from cbtk.tracing import stage
 
 
 def get_chart_options(title, ylabel):
@@ -68,7 +70,7 @@ def make_chart_config(records, title):
 
 def filter_latest_version(runners):
     dic = defaultdict(dict)
-    runners = sorted(runners)
+    runners = sorted(runners, key=attrgetter("sort_key"))
     for r in runners:
         dic[r.name][r.tags] = r
 
@@ -90,8 +92,11 @@ def get_latest_version(matrix, runner_order) -> Optional[List[Record]]:
     return None
 
 
-def make_speedup_data(config, records):
-    matrices = make_speedup_matrices(records, config)
+def make_speedup_data(config, records, matrices=None, index=None):
+    if matrices is None and index is not None:
+        matrices = index.speedup_matrices(config)
+    if matrices is None:
+        matrices = make_speedup_matrices(records, config)
 
     suites = {}
     for key, matrix in matrices.items():
@@ -100,12 +105,50 @@ def make_speedup_data(config, records):
     return {k: v for k, v in suites.items() if v is not None and len(v) > 1}
 
 
-def make_chart_config_json(config, suites):
-    chart_configs = []
-    for suite, records in suites.items():
-        chart_configs += [make_chart_config(records, str(suite))]
+def make_speedup_data_from_fragments(config, fragments):
+    """Return speedup data of suites and chart configs of them encoded
+    earlier, making speedup matrices only of suites without a fragment.
 
-    return json.dumps(chart_configs, indent=2)
+    Records of a suite read from a fragment have its runner only.
+    """
+    cached = {suite: fragments.get("runners", suite)
+              for suite in fragments.suites}
+    stale = [suite for suite, value in cached.items() if value is None]
+    built = make_speedup_data(config, None,
+                              fragments.speedup_matrices(config, stale))
+
+    indent = None if config.compact_json else 2
+    CachedRecord = namedtuple("CachedRecord", ["runner"])
+    suites = {}
+    encoded = {}
+    for suite, value in cached.items():
+        if value is None:
+            value = {"config": None, "runners": []}
+            if suite in built:
+                value["config"] = encode(
+                    make_chart_config(built[suite], str(suite)), indent)
+                value["runners"] = [str(r.runner) for r in built[suite]]
+            fragments.put("runners", suite, value)
+        if value["config"] is not None:
+            suites[suite] = [CachedRecord(r) for r in value["runners"]]
+            encoded[suite] = RawJSON(value["config"])
+
+    return suites, encoded
+
+
+def iter_chart_config_json(config, suites, encoded=None):
+    """Yield data.json of suites piece by piece. encoded maps a suite to
+    its chart config which has been encoded already."""
+    indent = None if config.compact_json else 2
+    encoded = encoded or {}
+    return iter_encode_array(
+        (encoded[suite] if suite in encoded else
+         make_chart_config(records, str(suite))
+         for suite, records in suites.items()), indent)
+
+
+def make_chart_config_json(config, suites):
+    return "".join(iter_chart_config_json(config, suites))
 
 
 def make_html(maker, config, suites):
@@ -115,24 +158,33 @@ def make_html(maker, config, suites):
         sections += [Section(title=str(suite), records=records)]
 
     nav = maker.get_template("nav.html").render(sections=sections)
-    contents = maker.get_template("runners.html").render(sections=sections)
 
     return {
         "title": "Runners",
         "nav": nav,
-        "contents": contents,
+        "contents_template": "runners.html",
+        "sections": sections,
         "use_chart": True,
-        "script": "runners.js"
+        "script": maker.asset_url("runners.js"),
+        "data": maker.asset_url("data.json"),
     }
 
 
-def make_page(maker, config, records):
-    suites = make_speedup_data(config, records)
+def make_page(maker, config, records, matrices=None, index=None,
+              fragments=None):
+    encoded = None
+    if fragments is not None:
+        suites, encoded = make_speedup_data_from_fragments(config, fragments)
+    else:
+        suites = make_speedup_data(config, records, matrices, index)
 
     # ignore suite without speedup
     suites = {k: v for k, v in suites.items() if v is not None}
 
     maker.copy_file(config, "runners.js")
-    maker.write("data.json", make_chart_config_json(config, suites))
-    maker.write("index.html",
-                maker.render_page(config, **make_html(maker, config, suites)))
+    with stage("json_encode"):
+        maker.write_stream("data.json",
+                           iter_chart_config_json(config, suites, encoded),
+                           fingerprint=True)
+    maker.write_page("index.html", config,
+                     **make_html(maker, config, suites))
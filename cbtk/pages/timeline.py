@@ -1,8 +1,15 @@
 from collections import defaultdict, namedtuple
 from dataclasses import dataclass
-import json
+import itertools
 
 from cbtk.core import groupby, Suite, Runner
+from cbtk.downsample import downsample
+from cbtk.jsonstream import RawJSON, encode, iter_encode_object
+from cbtk.pages import make_dirnames
+from cbtk.regression import detect_changes
+from cbtk.parallel import get_jobs, map_by_suite, map_groups
+from cbtk.timestamp import parse_timestamp, to_aware, to_epoch_ms
+from cbtk.tracing import stage
 
 
 class TimelineSeries:
@@ -12,13 +19,27 @@ class TimelineSeries:
         suite: Suite,
         benchmark: str,
         runner: Runner,
-        points: dict,
+        points: list,
+        xs: list = None,
     ):
         self.hostname = hostname
         self.suite = suite
         self.benchmark = benchmark
         self.runner = runner
         self.points = points
+        self._xs = xs
+
+    @property
+    def xs(self):
+        """x of each point in milliseconds since the epoch.
+
+        It is made from points on first use because only compact data,
+        downsampling and regressions need it.
+        """
+        if self._xs is None:
+            self._xs = [to_epoch_ms(parse_timestamp(p["x"]))
+                        for p in self.points]
+        return self._xs
 
     @property
     def label(self):
@@ -31,6 +52,8 @@ class TimelineChart:
         self.benchmark = benchmark
         self.runner_name = runner_name
         self.records = []
+        # chart config which has been encoded, e.g. read from a fragment
+        self.encoded = None
 
     def add(self, record: TimelineSeries):
         self.records += [record]
@@ -59,15 +82,22 @@ def make_sorter_by_runner(runner_orders=None):
 
 # Unstack by bench
 def make_timeline_points(records, metric):
+    """Return points of records by bench.
+
+    x of a point is run_at with its UTC offset, regarding naive run_at as
+    UTC as to_epoch_ms does, so that a browser does not read it in the
+    local time zone.
+    """
     points = defaultdict(list)
     for record in records:
         durations = record.get_values_by_metric(metric)
         version = str(record.runner.version)
+        x = to_aware(record.run_at).isoformat()
         for bench, value in durations.items():
             # add data point
             points[bench] += [
                 {
-                    "x": record.run_at.isoformat(),
+                    "x": x,
                     "y": value,
                     "version": version,  # JSON serializable
                     "tags": record.runner.tags,
@@ -83,23 +113,31 @@ def make_timeline_series(records):
         records,
         key=lambda r: Key(r.hostname, r.suite, r.runner.drop_dev_version()),
     )
+    return make_timeline_series_from_groups(g)
 
+
+def make_timeline_series_from_groups(groups):
+    """Make series from records grouped by (hostname, suite, runner
+    without dev version)."""
     series = []
-    for key, records in g.items():
+    for (hostname, suite, runner), records in groups.items():
         points = make_timeline_points(records, "duration")
         for bench, pts in points.items():
-            ser = TimelineSeries(
-                key.hostname, key.suite, bench, key.runner, pts
-            )
-            series += [ser]
+            series += [TimelineSeries(hostname, suite, bench, runner, pts)]
 
     return series
 
 
-# input records are sorted by run_at
-def make_timeline_charts(records, config):
-    series = make_timeline_series(records)
+def _make_timeline_charts(records):
+    return make_timeline_charts_from_series(make_timeline_series(records))
+
 
+def _make_timeline_charts_from_groups(groups):
+    return make_timeline_charts_from_series(
+        make_timeline_series_from_groups(groups))
+
+
+def make_timeline_charts_from_series(series):
     # group by suite, benchmark and runner_name
     Key = namedtuple("Key", ["suite", "benchmark", "runner_name"])
     grouped = defaultdict(list)
@@ -117,6 +155,33 @@ def make_timeline_charts(records, config):
     return charts
 
 
+# input records are sorted by run_at
+def make_timeline_charts(records, config, index=None):
+    with stage("timeline_series"):
+        jobs = get_jobs(config)
+        if jobs == 1 and index is not None:
+            return _make_timeline_charts_from_groups(index.timeline_groups())
+        if jobs == 1:
+            return _make_timeline_charts(records)
+
+        if index is not None:
+            results = map_groups(_make_timeline_charts_from_groups,
+                                 index.timeline_groups_by_suite(), jobs=jobs)
+        else:
+            results = map_by_suite(_make_timeline_charts, records, jobs=jobs)
+        charts = list(itertools.chain.from_iterable(results))
+        # charts of each suite are in the serial order. A stable sort by
+        # the first series merges them into it, which is by (hostname,
+        # suite, runner) as series are grouped.
+        charts.sort(key=_first_series_key)
+        return charts
+
+
+def _first_series_key(chart):
+    ser = chart.records[0]
+    return (ser.hostname, ser.suite, ser.runner)
+
+
 def get_line_chart_options(title):
     return {
         "animation": False,
@@ -147,9 +212,101 @@ def get_line_chart_options(title):
     }
 
 
-def make_chart_config(chart: TimelineChart):
+def encode_points(points, xs):
+    """Encode points as parallel arrays.
+
+    x is xs, milliseconds since the epoch. Versions and tags are stored
+    once in lookup tables and points refer to them by index. timeline.js
+    decodes the arrays back to points.
+    """
+    versions = {}
+    tags = {}
+    encoded = {"x": list(xs), "y": [], "version": [], "tag": []}
+    for point in points:
+        encoded["y"] += [point["y"]]
+        encoded["version"] += [
+            versions.setdefault(point["version"], len(versions))
+        ]
+        encoded["tag"] += [tags.setdefault(point["tags"], len(tags))]
+
+    encoded["versions"] = list(versions)
+    encoded["tags"] = list(tags)
+    return encoded
+
+
+def downsample_points(points, xs, threshold):
+    """Downsample points by LTTB.
+
+    Returns selected points and their xs.
+    """
+    if threshold <= 0 or len(points) <= threshold:
+        return points, xs
+
+    indices = downsample(xs, [p["y"] for p in points], threshold)
+    return [points[i] for i in indices], [xs[i] for i in indices]
+
+
+def make_dataset(ser: TimelineSeries, config):
+    """Make a dataset of a series.
+
+    When --timeline-points is given, data is downsampled for thumbnails.
+    When --timeline-detail-points is larger, detail holds that many points
+    for the single chart view, which otherwise shows data.
+    """
+    compact = config.compact_timeline
+    threshold = config.timeline_points
+
+    # xs is not made when neither encoding nor downsampling needs it
+    needs_xs = compact or 0 < threshold < len(ser.points)
+    points, xs = downsample_points(ser.points,
+                                   ser.xs if needs_xs else None, threshold)
+    if compact:
+        ds = {"label": ser.label, **encode_points(points, xs)}
+    else:
+        ds = {"label": ser.label, "data": points}
+
+    detail_threshold = config.timeline_detail_points
+    if len(points) < len(ser.points) and detail_threshold > len(points):
+        detail, detail_xs = downsample_points(ser.points, ser.xs,
+                                              detail_threshold)
+        if len(detail) > len(points):
+            ds["detail"] = (encode_points(detail, detail_xs)
+                            if compact else detail)
+
+    return ds
+
+
+def make_change_dataset(ser: TimelineSeries):
+    """Make a dataset which marks change points of a series, or None."""
+    changes = detect_changes(ser.points)
+    if not changes:
+        return None
+
+    data = [{
+        "x": c["run_at"],
+        "y": c["y"],
+        "version": c["version"],
+        "tags": c["tags"],
+        "change": f"{c['magnitude']:+.1%}",
+    } for c in changes]
+
+    return {
+        "label": f"{ser.label} change",
+        "data": data,
+        "showLine": False,
+        "pointStyle": "triangle",
+        "pointRadius": 6,
+        "borderColor": "red",
+        "backgroundColor": "red",
+    }
+
+
+def make_chart_config(chart: TimelineChart, config):
     title = f"{chart.suite}.{chart.benchmark}"
-    ds = [{"label": ser.label, "data": ser.points} for ser in chart.records]
+    ds = [make_dataset(ser, config) for ser in chart.records]
+    if config.show_regressions:
+        changes = [make_change_dataset(ser) for ser in chart.records]
+        ds += [c for c in changes if c is not None]
 
     return {
         "type": "line",
@@ -160,10 +317,31 @@ def make_chart_config(chart: TimelineChart):
     }
 
 
+def get_json_indent(config):
+    return None if config.compact_timeline or config.compact_json else 2
+
+
+def iter_chart_config_json(config, charts):
+    """Yield data.json of charts piece by piece.
+
+    A chart config is made when it is encoded so that only one of them is
+    in memory at a time.
+    """
+    return iter_encode_object(
+        ((c.chart_id, c.encoded if c.encoded is not None else
+          make_chart_config(c, config)) for c in charts),
+        get_json_indent(config))
+
+
 def make_chart_config_json(config, charts):
-    return json.dumps(
-        {c.chart_id: make_chart_config(c) for c in charts}, indent=2
-    )
+    return "".join(iter_chart_config_json(config, charts))
+
+
+def write_chart_config_json(maker, config, charts):
+    with stage("json_encode"):
+        maker.write_stream("data.json",
+                           iter_chart_config_json(config, charts),
+                           fingerprint=True)
 
 
 def make_timeline_subsection(runner_name, charts):
@@ -177,7 +355,7 @@ def make_timeline_subsection(runner_name, charts):
     return SubSection(title=runner_name, charts=tmp)
 
 
-def make_timeline_section(config, suite, charts):
+def make_timeline_section(config, suite, charts, href=None):
     by_runner_names = defaultdict(list)
     for chart in charts:
         by_runner_names[chart.runner_name] += [chart]
@@ -190,37 +368,125 @@ def make_timeline_section(config, suite, charts):
         for name in runner_names
     ]
 
-    Section = namedtuple("Section", ["title", "children"])
-    return Section(title=str(suite), children=subsecs)
+    Section = namedtuple("Section", ["title", "children", "href"])
+    return Section(title=str(suite), children=subsecs, href=href)
 
 
-def make_timeline_sections(config, charts):
+def groupby_suite(charts):
     by_suite = defaultdict(list)
     for chart in charts:
         by_suite[chart.suite] += [chart]
+    return by_suite
 
+
+def make_timeline_sections(config, charts):
+    by_suite = groupby_suite(charts)
     return [make_timeline_section(config, k, v) for k, v in by_suite.items()]
 
 
 def make_main_page(config, maker, charts, sections):
-    contents = maker.render("timeline/main.html", config, sections=sections)
+    maker.copy_file(config, "timeline.js")
+    write_chart_config_json(maker, config, charts)
+
     nav = maker.render("timeline/nav.html", config, sections=sections)
 
     page_data = {
         "title": "Timeline",
         "nav": nav,
-        "contents": contents,
-        "script": "timeline.js",
+        "contents_template": "timeline/main.html",
+        "sections": sections,
+        "script": maker.asset_url("timeline.js"),
+        "data": maker.asset_url("data.json"),
         "use_chart": True,
     }
 
+    maker.write_page("index.html", config, **page_data)
+
+
+def make_split_pages(config, maker, charts):
+    """Make one page and one data.json for each suite.
+
+    index.html only links suite pages so that a browser loads charts of one
+    suite at a time.
+    """
+    by_suite = groupby_suite(charts)
+    dirnames = make_dirnames(by_suite.keys())
+
+    sections = [
+        make_timeline_section(config, suite, suite_charts, href=dirname)
+        for (suite, suite_charts), dirname in zip(by_suite.items(), dirnames)
+    ]
+
     maker.copy_file(config, "timeline.js")
-    maker.write("data.json", make_chart_config_json(config, charts))
-    maker.write("index.html", maker.render_page(config, **page_data))
+
+    for section, suite_charts in zip(sections, by_suite.values()):
+        sub = maker.subpage(section.href)
+        write_chart_config_json(sub, config, suite_charts)
+        nav_sections = [s._replace(href=f"../{s.href}/") for s in sections]
+        page_data = {
+            "title": f"Timeline: {section.title}",
+            "nav": sub.render("timeline/nav.html", config,
+                              sections=nav_sections, current=section.title),
+            "contents_template": "timeline/main.html",
+            "sections": [section],
+            "script": sub.asset_url("../timeline.js"),
+            "data": sub.asset_url("data.json"),
+            "use_chart": True,
+        }
+        sub.write_page("index.html", config, **page_data)
+
+    nav_sections = [s._replace(href=f"{s.href}/") for s in sections]
+    page_data = {
+        "title": "Timeline",
+        "nav": maker.render("timeline/nav.html", config,
+                            sections=nav_sections),
+        "contents_template": "timeline/index.html",
+        "sections": nav_sections,
+    }
+    maker.write_page("index.html", config, **page_data)
 
 
-def make_page(maker, config, records):
-    charts = make_timeline_charts(records, config)
-    sections = make_timeline_sections(config, charts)
+def make_timeline_charts_from_fragments(config, fragments):
+    """Make charts of suites which have no fragment, and return charts of
+    all suites with encoded chart configs."""
+    cached = {suite: fragments.get("timeline", suite)
+              for suite in fragments.suites}
+    stale = [suite for suite, value in cached.items() if value is None]
+    built = groupby_suite(
+        make_timeline_charts(fragments.records(stale), config))
+
+    indent = get_json_indent(config)
+    charts = []
+    for suite, value in cached.items():
+        if value is None:
+            suite_charts = built.get(suite, [])
+            for chart in suite_charts:
+                chart.encoded = encode(make_chart_config(chart, config),
+                                       indent)
+            fragments.put("timeline", suite,
+                          [[c.benchmark, c.runner_name, c.encoded]
+                           for c in suite_charts])
+        else:
+            suite_charts = []
+            for benchmark, runner_name, encoded in value:
+                chart = TimelineChart(suite, benchmark, runner_name)
+                chart.encoded = RawJSON(encoded)
+                suite_charts += [chart]
+        charts += suite_charts
 
+    return charts
+
+
+def make_page(maker, config, records, charts=None, index=None,
+              fragments=None):
+    if charts is None and fragments is not None:
+        charts = make_timeline_charts_from_fragments(config, fragments)
+    if charts is None:
+        charts = make_timeline_charts(records, config, index)
+
+    if config.split_timeline:
+        make_split_pages(config, maker, charts)
+        return
+
+    sections = make_timeline_sections(config, charts)
     make_main_page(config, maker, charts, sections)
@@ -0,0 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import os
+
+from cbtk.core import groupby
+
+_executors = {}
+
+
+def get_executor(jobs):
+    """Return a process pool shared in this process.
+
+    jobs <= 0 means the number of CPUs.
+    """
+    max_workers = jobs if jobs > 0 else os.cpu_count()
+    executor = _executors.get(max_workers)
+    if executor is None:
+        executor = _executors[max_workers] = ProcessPoolExecutor(max_workers)
+    return executor
+
+
+def get_jobs(config):
+    return getattr(config, "jobs", 1)
+
+
+def map_by_suite(func, records, *args, jobs=1):
+    """Call func(records, *args) for records of each suite.
+
+    Suites are processed in a process pool when jobs is not 1. Results are
+    returned in the order of suites.
+    """
+    groups = groupby(records, key=lambda r: r.suite)
+    return map_groups(func, list(groups.values()), *args, jobs=jobs)
+
+
+def map_groups(func, groups, *args, jobs=1):
+    """Call func(group, *args) for each of groups.
+
+    Groups are processed in a process pool when jobs is not 1. Results are
+    returned in the order of groups.
+    """
+    if jobs == 1 or len(groups) < 2:
+        return [func(group, *args) for group in groups]
+
+    executor = get_executor(jobs)
+    return list(
+        executor.map(func, groups,
+                     *[itertools.repeat(arg, len(groups)) for arg in args]))
@@ -0,0 +1,206 @@
+"""Online change-point detection on timeline series.
+
+Each series is scanned once by a two-sided CUSUM on standardized durations.
+The baseline is the mean and standard deviation of the points since the
+last change. The state of a detector is a plain dict so that it can be
+stored and detection can continue when new points arrive.
+"""
+import bisect
+import json
+import math
+
+from cbtk.timestamp import parse_timestamp, to_aware, to_epoch_ms
+
+
+class Stats:
+    """Running mean and variance by Welford's algorithm."""
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def to_dict(self):
+        return {"n": self.n, "mean": self.mean, "m2": self.m2}
+
+
+class ChangePointDetector:
+    """Two-sided CUSUM change-point detector.
+
+    A change is reported when the cumulative sum of standardized deviations
+    beyond k exceeds h. The change is placed at the point where the sum
+    started to grow and its magnitude is the ratio of the mean after the
+    change to the baseline mean minus 1. Changes smaller than min_change
+    are ignored.
+    """
+
+    def __init__(self, k=0.5, h=5.0, warmup=5, min_change=0.05,
+                 min_std=0.01):
+        self.k = k
+        self.h = h
+        self.warmup = warmup
+        self.min_change = min_change
+        self.min_std = min_std
+        self.changes = []
+        self._reset(Stats())
+
+    def _reset(self, baseline):
+        self.baseline = baseline
+        self.pos, self.neg = 0.0, 0.0
+        self.pos_start = self.neg_start = None
+        self.pos_stats, self.neg_stats = Stats(), Stats()
+
+    def add(self, point):
+        """Add a point of a timeline series and return a change if found."""
+        y = point["y"]
+        if self.baseline.n < self.warmup:
+            self.baseline.add(y)
+            return None
+
+        std = max(self.baseline.std, self.min_std * abs(self.baseline.mean))
+        z = (y - self.baseline.mean) / std if std > 0 else 0.0
+
+        self.pos = max(0.0, self.pos + z - self.k)
+        self.neg = max(0.0, self.neg - z - self.k)
+        if self.pos == 0.0:
+            self.pos_start, self.pos_stats = None, Stats()
+        elif self.pos_start is None:
+            self.pos_start = point
+        if self.neg == 0.0:
+            self.neg_start, self.neg_stats = None, Stats()
+        elif self.neg_start is None:
+            self.neg_start = point
+        if self.pos_start is not None:
+            self.pos_stats.add(y)
+        if self.neg_start is not None:
+            self.neg_stats.add(y)
+
+        if self.pos > self.h:
+            return self._change(self.pos_start, self.pos_stats)
+        if self.neg > self.h:
+            return self._change(self.neg_start, self.neg_stats)
+        if self.baseline.n < self.warmup * 4 and abs(z) < self.k:
+            # refine baseline while it is short and stable
+            self.baseline.add(y)
+        return None
+
+    def _change(self, start, stats):
+        magnitude = stats.mean / self.baseline.mean - 1.0
+        self._reset(stats)
+        if abs(magnitude) < self.min_change:
+            return None
+
+        change = {
+            "run_at": start["x"],
+            "version": start["version"],
+            "tags": start["tags"],
+            "y": start["y"],
+            "magnitude": magnitude,
+        }
+        self.changes.append(change)
+        return change
+
+    def to_dict(self):
+        return {
+            "baseline": self.baseline.to_dict(),
+            "pos": self.pos,
+            "neg": self.neg,
+            "pos_start": self.pos_start,
+            "neg_start": self.neg_start,
+            "pos_stats": self.pos_stats.to_dict(),
+            "neg_stats": self.neg_stats.to_dict(),
+            "changes": self.changes,
+        }
+
+    @classmethod
+    def from_dict(cls, dic, **kwargs):
+        detector = cls(**kwargs)
+        detector.baseline = Stats(**dic["baseline"])
+        detector.pos, detector.neg = dic["pos"], dic["neg"]
+        detector.pos_start = dic["pos_start"]
+        detector.neg_start = dic["neg_start"]
+        detector.pos_stats = Stats(**dic["pos_stats"])
+        detector.neg_stats = Stats(**dic["neg_stats"])
+        detector.changes = dic["changes"]
+        return detector
+
+
+def detect_changes(points, **kwargs):
+    detector = ChangePointDetector(**kwargs)
+    for point in points:
+        detector.add(point)
+    return detector.changes
+
+
+def series_key(ser):
+    return f"{ser.hostname}/{ser.suite}/{ser.benchmark}/{ser.runner.longname}"
+
+
+def update_changes(series, state, **kwargs):
+    """Feed points newer than the last ones seen to detectors in state.
+
+    state maps series_key to a detector state and the x of the last point.
+    It is updated in place. Returns a dict from series_key to changes.
+    Points are found by bisecting xs of a series, which are sorted.
+    """
+    result = {}
+    for ser in series:
+        key = series_key(ser)
+        entry = state.get(key)
+        if entry is None:
+            detector = ChangePointDetector(**kwargs)
+            last_x = None
+        else:
+            detector = ChangePointDetector.from_dict(entry["detector"],
+                                                     **kwargs)
+            last_x = entry["last_x"]
+
+        start = 0
+        if last_x is not None:
+            start = bisect.bisect_right(ser.xs,
+                                        to_epoch_ms(parse_timestamp(last_x)))
+        for point in ser.points[start:]:
+            detector.add(point)
+            last_x = point["x"]
+
+        state[key] = {"detector": detector.to_dict(), "last_x": last_x}
+        result[key] = detector.changes
+
+    return result
+
+
+def oldest_last_run_at(state):
+    """Return the oldest run_at of the last points in state, or None.
+
+    Records before it have been scanned for every series in state.
+    """
+    run_ats = [
+        to_aware(parse_timestamp(entry["last_x"]))
+        for entry in state.values() if entry["last_x"] is not None
+    ]
+    if not run_ats or len(run_ats) < len(state):
+        return None
+    return min(run_ats)
+
+
+def load_state(filename):
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def store_state(filename, state):
+    with open(filename, "w") as f:
+        json.dump(state, f)
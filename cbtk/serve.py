@@ -0,0 +1,257 @@
+"""HTTP server which makes pages on request.
+
+Records are loaded once. A page and its data.json are made for records of
+the host, suite and runner given by the query of a request, such as
+/timeline/?suite=s1&runner=a, and kept in an LRU cache. With
+--split-timeline, suite pages are made with the timeline page and served
+under it. Scripts and styles are served from the resource directory.
+Responses have ETags so that browsers can revalidate them by conditional
+GETs.
+"""
+from collections import OrderedDict
+import hashlib
+import http.server
+import mimetypes
+import os
+import posixpath
+import threading
+import urllib.parse
+
+from cbtk.filter import RecordFilter
+from cbtk.pages import GENERATED_AT, PageMaker
+from cbtk.table import RecordTable
+
+PAGES = ("timeline", "runners")
+
+# files made for each query. Others are served from the resource directory.
+PAGE_FILES = ("index.html", "data.json")
+
+
+class LRUCache:
+    """Thread-safe LRU cache of at most maxsize entries."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MemoryPageMaker(PageMaker):
+    """PageMaker which keeps written pages in a dict instead of a
+    directory. Keys are paths relative to the page."""
+
+    def __init__(self, path, env, files, prefix=""):
+        self.path = path
+        self.env = env
+        self.files = files
+        self.prefix = prefix
+        self.manifest = None
+        self.assets = None
+
+    def copy_file(self, config, src_file, dest_file=None):
+        pass
+
+    def write(self, filename, contents):
+        # generated_at is the time when records were loaded
+        self.files[self.prefix + filename] = contents.encode()
+
+    def write_stream(self, filename, chunks, fingerprint=False):
+        self.write(filename, "".join(chunks))
+
+    def write_page(self, filename, config, **kwargs):
+        self.write(filename, self.render_page(config, **kwargs))
+
+    def subpage(self, path):
+        return MemoryPageMaker(posixpath.join(self.path, path), self.env,
+                               self.files, f"{self.prefix}{path}/")
+
+
+class Views:
+    """Pages made from records on request.
+
+    Records are kept in a RecordTable, which holds values in arrays instead
+    of objects per record, and pages get views of selected records.
+    Records without values are not shown on pages and are dropped.
+    """
+
+    def __init__(self, config, env, records, cache_size):
+        self.config = config
+        self.env = env
+        self.table = RecordTable.from_records(r for r in records
+                                              if r.benchmarks)
+        self.hostnames = sorted(h for h in self.table.hosts.values
+                                if h is not None)
+        self.cache = LRUCache(cache_size)
+
+    def _default_hostname(self):
+        if self.config.hostname is not None:
+            return self.config.hostname
+        return self.hostnames[0] if self.hostnames else None
+
+    def select(self, page, query):
+        """Return records of a page selected by query."""
+        hostname = query.get("host")
+        # timeline and runners pages are not hostname-aware
+        if hostname is None and page in PAGES:
+            hostname = self._default_hostname()
+        suite = query.get("suite")
+        runner = query.get("runner")
+        f = RecordFilter(hostname=hostname,
+                         suites=None if suite is None else [suite],
+                         runners=None if runner is None else [runner])
+        return self.table.select(self.table.indices(f))
+
+    def make(self, page, query):
+        """Return a dict from filenames of a page to their contents."""
+        from cbtk.pages import home, runners, timeline
+
+        files = {}
+        records = self.select(page, query)
+        maker = MemoryPageMaker(page, self.env, files)
+        if page == "timeline":
+            timeline.make_page(maker, self.config, records)
+        elif page == "runners":
+            runners.make_page(maker, self.config, records)
+        elif records:
+            # speedups are printed only by publish
+            home.make_page(maker, self.config, records)
+        return files
+
+    def get(self, page, query):
+        """Return a dict from filenames to (contents, etag)."""
+        key = (page, tuple(sorted(query.items())))
+        files = self.cache.get(key)
+        if files is None:
+            files = {
+                name: (contents, make_etag(contents))
+                for name, contents in self.make(page, query).items()
+            }
+            self.cache.put(key, files)
+        return files
+
+    def get_resource(self, filename):
+        """Return (contents, etag) of a file in the resource directory."""
+        key = ("resource", filename)
+        entry = self.cache.get(key)
+        if entry is None:
+            path = os.path.join(self.config.resource_dir,
+                                os.path.basename(filename))
+            if not os.path.isfile(path):
+                return None
+            with open(path, "rb") as f:
+                contents = f.read()
+            entry = (contents, make_etag(contents))
+            self.cache.put(key, entry)
+        return entry
+
+
+def make_etag(contents):
+    return hashlib.sha1(contents).hexdigest()
+
+
+def parse_path(path):
+    """Split a request path into a page, a filename and a query."""
+    url = urllib.parse.urlsplit(path)
+    parts = [p for p in url.path.split("/") if p]
+    page = ""
+    if parts and parts[0] in PAGES:
+        page = parts.pop(0)
+    if url.path.endswith("/") or not parts:
+        parts += ["index.html"]
+    filename = "/".join(parts)
+    query = dict(urllib.parse.parse_qsl(url.query))
+    return page, filename, query
+
+
+def parse_etags(header):
+    """Return opaque tags in If-None-Match, or None for "*".
+
+    Weak validators match as strong ones because the comparison of
+    If-None-Match is weak.
+    """
+    etags = []
+    for etag in header.split(","):
+        etag = etag.strip()
+        if etag == "*":
+            return None
+        if etag.startswith("W/"):
+            etag = etag[2:]
+        if etag:
+            etags += [etag]
+    return etags
+
+
+def is_not_modified(header, etag):
+    if header is None:
+        return False
+    etags = parse_etags(header)
+    return etags is None or etag in etags
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    views = None
+    generated_at = None
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        page, filename, query = parse_path(self.path)
+        if posixpath.basename(filename) in PAGE_FILES:
+            entry = self.views.get(page, query).get(filename)
+        else:
+            entry = self.views.get_resource(filename)
+        if entry is None:
+            self.send_error(404)
+            return
+
+        contents, etag = entry
+        etag = f'"{etag}"'
+        if is_not_modified(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        contents = contents.replace(GENERATED_AT.encode(),
+                                    self.generated_at.encode())
+        content_type = mimetypes.guess_type(filename)[0]
+        if filename.endswith(".js"):
+            content_type = "text/javascript"
+        self.send_response(200)
+        self.send_header("Content-Type",
+                         content_type or "application/octet-stream")
+        self.send_header("Content-Length", str(len(contents)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(contents)
+
+
+def make_server(address, views, generated_at):
+    handler = type("BoundHandler", (Handler, ), {
+        "views": views,
+        "generated_at": generated_at,
+    })
+    return http.server.ThreadingHTTPServer(address, handler)
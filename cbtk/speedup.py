@@ -1,8 +1,12 @@
 from collections import defaultdict, namedtuple
+import math
+from operator import attrgetter, truediv
 from statistics import geometric_mean
 from typing import List
 
 from cbtk.core import Record, groupby, Runner
+from cbtk.parallel import get_jobs, map_by_suite
+from cbtk.tracing import stage
 
 
 class SpeedupMatrix:
@@ -43,9 +47,145 @@ def make_speedup_record(record, base_durs, use_geomean=False):
     return record
 
 
+class SpeedupTable:
+    """Durations of runners x benchmarks of a suite.
+
+    A missing duration is stored as 0.0 in the numerator row and infinity
+    in the denominator row so that its speedup is 0.0 and does not change a
+    sum. masks[i] has bit j set when runner i has benchmark j.
+    """
+
+    def __init__(self, records):
+        self.records = records
+
+        self.durations = [r.get_values_by_metric("duration") for r in records]
+
+        self.benchmarks = []
+        index = {}
+        for durs in self.durations:
+            for name in durs:
+                if name not in index:
+                    index[name] = len(self.benchmarks)
+                    self.benchmarks += [name]
+
+        n = len(self.benchmarks)
+        self.numerators = []
+        self.denominators = []
+        self.masks = []
+        for durs in self.durations:
+            numerator = [0.0] * n
+            denominator = [math.inf] * n
+            mask = 0
+            for name, dur in durs.items():
+                j = index[name]
+                numerator[j] = denominator[j] = dur
+                mask |= 1 << j
+            self.numerators += [numerator]
+            self.denominators += [denominator]
+            self.masks += [mask]
+
+        self._logs = None
+        self._log_sums = {}
+
+    @property
+    def logs(self):
+        """Logs of durations, which only the geometric mean needs.
+
+        They are computed on first use so that an arithmetic mean does not
+        fail on a zero duration.
+        """
+        if self._logs is None:
+            self._logs = [[
+                math.log(dur) if mask >> j & 1 else 0.0
+                for j, dur in enumerate(row)
+            ] for row, mask in zip(self.numerators, self.masks)]
+        return self._logs
+
+    def _log_sum(self, i, mask):
+        key = (i, mask)
+        if key not in self._log_sums:
+            logs = self.logs[i]
+            self._log_sums[key] = math.fsum(
+                logs[j] for j in range(len(logs)) if mask >> j & 1)
+        return self._log_sums[key]
+
+    def average(self, base, target, use_geomean=False):
+        """Return average speedup of target over base.
+
+        The geometric mean is computed in log space from sums of logs of
+        durations which are shared by all pairs with the same benchmarks.
+        """
+        mask = self.masks[base] & self.masks[target]
+        count = bin(mask).count("1")
+        if use_geomean:
+            log_sum = self._log_sum(base, mask) - self._log_sum(target, mask)
+            return math.exp(log_sum / count)
+
+        return sum(
+            map(truediv, self.numerators[base],
+                self.denominators[target])) / count
+
+
+class SpeedupRecord:
+    """Record of speedups of a target runner over a base runner.
+
+    Speedups of benchmarks are computed on demand from SpeedupTable, so
+    that a matrix does not hold a copy of the target record per cell. It
+    has the same values as the record made by make_speedup_record.
+    """
+
+    def __init__(self, table, base, target, average):
+        self._base_durs = table.durations[base]
+        self._target_durs = table.durations[target]
+        self._target = table.records[target]
+        self._average = average
+        self.suite = self._target.suite
+        self.runner = self._target.runner
+        self.run_at = self._target.run_at
+        self.hostname = self._target.hostname
+
+    def _speedup(self, name):
+        if name not in self._base_durs:
+            return None
+        return self._base_durs[name] / self._target_durs[name]
+
+    def deepcopy(self):
+        values = {
+            name: self.get_values_by_bench(name)
+            for name in self.benchmarks
+        }
+        return Record(suite=self.suite,
+                      runner=self.runner,
+                      run_at=self.run_at,
+                      hostname=self.hostname,
+                      values=values)
+
+    @property
+    def benchmarks(self):
+        return self._target.benchmarks + ["_average"]
+
+    def value(self, metric, name):
+        return self.get_values_by_bench(name)[metric]
+
+    def get_values_by_metric(self, metric):
+        values = {}
+        for name in self.benchmarks:
+            dic = self.get_values_by_bench(name)
+            if metric in dic:
+                values[name] = dic[metric]
+        return values
+
+    def get_values_by_bench(self, bench):
+        if bench == "_average":
+            return {"_speedup": self._average}
+        values = dict(self._target.get_values_by_bench(bench))
+        values["_speedup"] = self._speedup(bench)
+        return values
+
+
 def drop_old_dev_version(runners):
     dic = defaultdict(list)
-    for runner in sorted(runners):
+    for runner in sorted(runners, key=attrgetter("sort_key")):
         dic[runner.drop_dev_version()] += [runner]
 
     return [lst[-1] for lst in dic.values()]
@@ -65,26 +205,26 @@ def make_speedup_matrix_for_suite(records, config):
     runners = drop_old_dev_version(records_by_runner.keys())
     records_by_runner = {r: records_by_runner[r] for r in runners}
 
+    for r in records_by_runner:
+        assert len(records_by_runner[r]) == 1
+    table = SpeedupTable([records_by_runner[r][0] for r in records_by_runner])
+
     matrix = SpeedupMatrix()
-    for r0 in records_by_runner:
-        assert len(records_by_runner[r0]) == 1
-        base_record = records_by_runner[r0][0]
-        base_durs = base_record.get_values_by_metric("duration")
-        for r1 in records_by_runner:
-            assert len(records_by_runner[r1]) == 1
-            target_record = records_by_runner[r1][0]
-            speedup_record = make_speedup_record(target_record, base_durs,
-                                                 config.geomean)
-            matrix.set(r0, r1, speedup_record)
+    for i0, r0 in enumerate(records_by_runner):
+        for i1, r1 in enumerate(records_by_runner):
+            average = table.average(i0, i1, config.geomean)
+            matrix.set(r0, r1, SpeedupRecord(table, i0, i1, average))
 
     return matrix
 
 
+SuiteRunner = namedtuple("SuiteRunner", ["suite", "runner"])
+
+
 def groupby_srvt(records):
-    Key = namedtuple("Key", ["suite", "runner"])
 
     def key_func(record):
-        return Key(suite=record.suite, runner=record.runner)
+        return SuiteRunner(suite=record.suite, runner=record.runner)
 
     return groupby(records, key=key_func)
 
@@ -103,9 +243,8 @@ def make_fastest_record(suite, runner, records):
     return Record(suite=suite, runner=runner, values=values)
 
 
-def groupby_fastest(records):
-    grouped = groupby_srvt(records)
-
+def fastest_by_group(grouped):
+    """Return the fastest record of each group keyed by SuiteRunner."""
     aggregated = {}
     for key in grouped:
         aggregated[key] = make_fastest_record(key.suite, key.runner,
@@ -114,9 +253,23 @@ def groupby_fastest(records):
     return aggregated
 
 
-def make_speedup_matrices(records, config):
-    fastests = groupby_fastest(records)
+def groupby_fastest(records):
+    return fastest_by_group(groupby_srvt(records))
 
+
+def _make_speedup_matrices(records, config):
+    return make_speedup_matrices_from_groups(groupby_srvt(records), config)
+
+
+def make_speedup_matrices_from_groups(grouped, config):
+    """Make speedup matrices from records grouped by SuiteRunner."""
+    with stage("groupby_fastest"):
+        fastests = fastest_by_group(grouped)
+
+    return make_speedup_matrices_from_fastests(fastests, config)
+
+
+def make_speedup_matrices_from_fastests(fastests, config):
     suites = defaultdict(list)
     for key, record in fastests.items():
         suites[key.suite] += [record]
@@ -125,3 +278,16 @@ def make_speedup_matrices(records, config):
         key: make_speedup_matrix_for_suite(suites[key], config)
         for key in suites
     }
+
+
+def make_speedup_matrices(records, config):
+    with stage("speedup_matrices"):
+        jobs = get_jobs(config)
+        if jobs == 1:
+            return _make_speedup_matrices(records, config)
+
+        matrices = {}
+        for dic in map_by_suite(_make_speedup_matrices, records, config,
+                                jobs=jobs):
+            matrices.update(dic)
+        return matrices
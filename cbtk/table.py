@@ -0,0 +1,345 @@
+from array import array
+from collections import defaultdict
+import datetime
+import itertools
+import operator
+
+from cbtk.core import Record
+from cbtk.timestamp import to_aware
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class Interner:
+    """Map values to small integer ids and back."""
+
+    def __init__(self, key=None):
+        self._key = key or (lambda value: value)
+        self._ids = {}
+        self.values = []
+
+    def intern(self, value):
+        k = self._key(value)
+        id_ = self._ids.get(k)
+        if id_ is None:
+            id_ = len(self.values)
+            self._ids[k] = id_
+            self.values.append(value)
+        return id_
+
+    def get(self, value):
+        """Return the id of value, or None if it is not interned."""
+        return self._ids.get(self._key(value))
+
+    def __getitem__(self, id_):
+        return self.values[id_]
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _to_epoch(run_at):
+    if run_at.tzinfo is None:
+        return (run_at - _EPOCH.replace(tzinfo=None)).total_seconds()
+    return (run_at - _EPOCH).total_seconds()
+
+
+def _from_epoch(epoch, utcoffset):
+    run_at = _EPOCH + datetime.timedelta(seconds=epoch)
+    if utcoffset is None:
+        return run_at.replace(tzinfo=None)
+    return run_at.astimezone(datetime.timezone(utcoffset))
+
+
+def _make_record(suite, runner, run_at, hostname, values):
+    return Record(suite=suite,
+                  runner=runner,
+                  run_at=run_at,
+                  hostname=hostname,
+                  values=values)
+
+
+class RecordTable:
+    """Columnar store of records.
+
+    Each row is one value of a record, i.e. (hostname, suite, runner, run_at,
+    benchmark, metric, value). Strings, suites and runners are interned and
+    stored as ids in arrays, run_at is stored as seconds since the epoch
+    with its UTC offset.
+    Rows of a record are contiguous, and record_offsets[i] is the first row
+    of the i-th record. Rows of a benchmark in a record are contiguous too
+    and make a group. Groups of the i-th record are record_groups[i] to
+    record_groups[i + 1], and the g-th group has rows group_offsets[g] to
+    group_offsets[g + 1] of benchmark group_bench_ids[g], so that a value
+    is looked up without decoding other values of the record.
+
+    Indexing or iterating a table gives RecordView which has the same
+    interface as Record.
+    """
+
+    COLUMNS = ("host", "suite", "runner", "run_at", "bench", "metric")
+
+    def __init__(self):
+        self.hosts = Interner()
+        self.suites = Interner(key=lambda s: (s.name, s.tags))
+        self.runners = Interner(key=lambda r: (r.name, r.version, r.tags))
+        self.utcoffsets = Interner()
+        self.benchmarks = Interner()
+        self.metrics = Interner()
+
+        self.host_ids = array("I")
+        self.suite_ids = array("I")
+        self.runner_ids = array("I")
+        self.run_ats = array("d")
+        self.bench_ids = array("I")
+        self.metric_ids = array("I")
+        self.values = array("d")
+
+        # per record
+        self.utcoffset_ids = array("I")
+        self.record_offsets = array("Q", [0])
+        self.record_groups = array("Q", [0])
+
+        # per group of rows of a benchmark in a record
+        self.group_bench_ids = array("I")
+        self.group_offsets = array("Q", [0])
+
+    @classmethod
+    def from_records(cls, records):
+        table = cls()
+        for record in records:
+            table.append(record)
+        return table
+
+    def append(self, record):
+        if not record.benchmarks:
+            raise ValueError("record without values")
+
+        host = self.hosts.intern(record.hostname)
+        suite = self.suites.intern(record.suite)
+        runner = self.runners.intern(record.runner)
+        run_at = _to_epoch(record.run_at)
+        self.utcoffset_ids.append(
+            self.utcoffsets.intern(record.run_at.utcoffset()))
+
+        for bench in record.benchmarks:
+            bench_id = self.benchmarks.intern(bench)
+            for metric, value in record.get_values_by_bench(bench).items():
+                self.host_ids.append(host)
+                self.suite_ids.append(suite)
+                self.runner_ids.append(runner)
+                self.run_ats.append(run_at)
+                self.bench_ids.append(bench_id)
+                self.metric_ids.append(self.metrics.intern(metric))
+                self.values.append(value)
+            self.group_bench_ids.append(bench_id)
+            self.group_offsets.append(len(self.values))
+
+        self.record_offsets.append(len(self.values))
+        self.record_groups.append(len(self.group_bench_ids))
+
+    def __len__(self):
+        return len(self.record_offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return RecordView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield RecordView(self, index)
+
+    def _column(self, name):
+        return {
+            "host": self.host_ids,
+            "suite": self.suite_ids,
+            "runner": self.runner_ids,
+            "run_at": self.run_ats,
+            "bench": self.bench_ids,
+            "metric": self.metric_ids,
+        }[name]
+
+    def group_indices(self, *columns):
+        """Group record indices by ids of columns.
+
+        Only per-record columns, i.e. host, suite, runner and run_at, can be
+        used. Keys are tuples of ids in the same order as columns and are
+        sorted.
+        """
+        if not columns or any(c not in self.COLUMNS[:4] for c in columns):
+            raise ValueError(f"illegal columns: {columns}")
+
+        arrays = [self._column(c) for c in columns]
+        grouped = defaultdict(list)
+        for index, offset in enumerate(self.record_offsets[:-1]):
+            grouped[tuple(a[offset] for a in arrays)].append(index)
+
+        return {key: grouped[key] for key in sorted(grouped)}
+
+    def indices(self, record_filter=None):
+        """Return indices of records which match record_filter.
+
+        Hosts, suites and runners are matched once per interned value, and
+        ids and run_at of records are compared without making views.
+        """
+        if record_filter is None:
+            return range(len(self))
+
+        f = record_filter
+        tables = [
+            (self.host_ids, [f.match_hostname(h) for h in self.hosts.values]),
+            (self.suite_ids,
+             [f.match_suite(s.name, s.tags) for s in self.suites.values]),
+            (self.runner_ids, [
+                f.match_runner_name(r.name) and f.match_version(r.version)
+                for r in self.runners.values
+            ]),
+        ]
+
+        firsts = self.record_offsets[:-1]
+        masks = []
+        for ids, ok in tables:
+            if not any(ok):
+                return []
+            if not all(ok):
+                masks.append(bytes(map(ok.__getitem__,
+                                       map(ids.__getitem__, firsts))))
+
+        # naive run_at is stored as UTC as match_run_at regards it
+        if f.since is not None or f.until is not None:
+            run_ats = list(map(self.run_ats.__getitem__, firsts))
+            if f.since is not None:
+                since = _to_epoch(to_aware(f.since))
+                masks.append(bytes(map(operator.le, itertools.repeat(since),
+                                       run_ats)))
+            if f.until is not None:
+                until = _to_epoch(to_aware(f.until))
+                masks.append(bytes(map(operator.ge, itertools.repeat(until),
+                                       run_ats)))
+
+        if not masks:
+            return range(len(self))
+        mask = masks[0]
+        for m in masks[1:]:
+            mask = bytes(map(operator.and_, mask, m))
+        return list(itertools.compress(range(len(self)), mask))
+
+    def select(self, indices):
+        return [RecordView(self, index) for index in indices]
+
+    def to_records(self):
+        return [view.deepcopy() for view in self]
+
+
+class RecordView:
+    """Read-only view of a record in RecordTable."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def _rows(self):
+        offsets = self._table.record_offsets
+        return range(offsets[self._index], offsets[self._index + 1])
+
+    @property
+    def _first(self):
+        return self._table.record_offsets[self._index]
+
+    @property
+    def suite(self):
+        return self._table.suites[self._table.suite_ids[self._first]]
+
+    @property
+    def runner(self):
+        return self._table.runners[self._table.runner_ids[self._first]]
+
+    @property
+    def hostname(self):
+        return self._table.hosts[self._table.host_ids[self._first]]
+
+    @property
+    def run_at(self):
+        t = self._table
+        utcoffset = t.utcoffsets[t.utcoffset_ids[self._index]]
+        return _from_epoch(t.run_ats[self._first], utcoffset)
+
+    @property
+    def _groups(self):
+        groups = self._table.record_groups
+        return range(groups[self._index], groups[self._index + 1])
+
+    def __reduce__(self):
+        # a process pool gets a record instead of the whole table
+        return (_make_record, (self.suite, self.runner, self.run_at,
+                               self.hostname, self._values()))
+
+    def _items(self):
+        t = self._table
+        for row in self._rows:
+            yield (t.benchmarks[t.bench_ids[row]],
+                   t.metrics[t.metric_ids[row]], t.values[row])
+
+    def _values(self):
+        values = {}
+        for bench, metric, value in self._items():
+            values.setdefault(bench, {})[metric] = value
+        return values
+
+    def deepcopy(self):
+        return _make_record(self.suite, self.runner, self.run_at,
+                            self.hostname, self._values())
+
+    @property
+    def benchmarks(self):
+        t = self._table
+        return [t.benchmarks[t.group_bench_ids[g]] for g in self._groups]
+
+    def _bench_rows(self, bench):
+        t = self._table
+        bench_id = t.benchmarks.get(bench)
+        groups = self._groups
+        if bench_id is not None:
+            ids = t.group_bench_ids[groups.start:groups.stop]
+            if bench_id in ids:
+                g = groups.start + ids.index(bench_id)
+                return range(t.group_offsets[g], t.group_offsets[g + 1])
+        return range(0)
+
+    def value(self, metric, name):
+        t = self._table
+        metric_id = t.metrics.get(metric)
+        for row in self._bench_rows(name):
+            if t.metric_ids[row] == metric_id:
+                return t.values[row]
+        raise KeyError((name, metric))
+
+    def get_values_by_metric(self, metric):
+        t = self._table
+        metric_id = t.metrics.get(metric)
+        values = {}
+        if metric_id is None:
+            return values
+        offsets = t.group_offsets
+        for g in self._groups:
+            for row in range(offsets[g], offsets[g + 1]):
+                if t.metric_ids[row] == metric_id:
+                    values[t.benchmarks[t.group_bench_ids[g]]] = t.values[row]
+                    break
+        return values
+
+    def get_values_by_bench(self, bench):
+        t = self._table
+        values = {
+            t.metrics[t.metric_ids[row]]: t.values[row]
+            for row in self._bench_rows(bench)
+        }
+        if not values:
+            raise KeyError(bench)
+        return values
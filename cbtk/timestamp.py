@@ -0,0 +1,31 @@
+import datetime
+import functools
+
+import dateutil.parser
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_timestamp(text: str) -> datetime.datetime:
+    """Parse a timestamp such as run_at of a record.
+
+    Strings written by datetime.isoformat(), which is what cbtk writes, are
+    parsed by datetime.fromisoformat. Others fall back to dateutil. Results
+    are memoized because records in a result file often share run_at.
+    """
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return dateutil.parser.parse(text)
+
+
+def to_aware(dt: datetime.datetime) -> datetime.datetime:
+    """Return dt with tzinfo, regarding naive datetime as UTC."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+def to_epoch_ms(dt: datetime.datetime) -> int:
+    """Return milliseconds since the epoch, regarding naive dt as UTC so
+    that it does not depend on the local time zone."""
+    return round(to_aware(dt).timestamp() * 1000)
@@ -0,0 +1,116 @@
+"""Per-stage timing and memory trace of publish.
+
+Stages are marked by `with stage(name):` anywhere in cbtk. They cost
+nothing until a Tracer is started by start(). A stage entered more than
+once, such as rendering of each page, is summed up in the summary.
+"""
+import contextlib
+import json
+import time
+import tracemalloc
+
+_tracer = None
+
+
+class Tracer:
+    """Record wall time, CPU time and tracemalloc peak of stages.
+
+    Stages can be nested. The peak of a stage includes its children.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._stack = []
+        self._start = time.perf_counter()
+
+    def _flush_peak(self):
+        # tracemalloc has one peak, which is reset when a stage starts.
+        # Keep the peak seen so far in the enclosing stage.
+        if self._stack:
+            _, peak = tracemalloc.get_traced_memory()
+            self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self._flush_peak()
+        if hasattr(tracemalloc, "reset_peak"):  # python >= 3.9
+            tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        frame = {"peak": current}
+        self._stack.append(frame)
+
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            self._flush_peak()
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"],
+                                              frame["peak"])
+            self.events.append({
+                "name": name,
+                "depth": len(self._stack),
+                "start": start - self._start,
+                "wall": wall,
+                "cpu": cpu,
+                "memory_start": current,
+                "memory_peak": frame["peak"],
+            })
+
+    def summary(self):
+        """Return totals of stages by name in the order of first start."""
+        totals = {}
+        for e in sorted(self.events, key=lambda e: e["start"]):
+            t = totals.setdefault(e["name"], {
+                "count": 0,
+                "wall": 0.0,
+                "cpu": 0.0,
+                "memory_peak": 0,
+            })
+            t["count"] += 1
+            t["wall"] += e["wall"]
+            t["cpu"] += e["cpu"]
+            t["memory_peak"] = max(t["memory_peak"], e["memory_peak"])
+        return totals
+
+    def to_dict(self):
+        return {
+            "stages": sorted(self.events, key=lambda e: e["start"]),
+            "summary": self.summary(),
+        }
+
+
+def start():
+    global _tracer
+    tracemalloc.start()
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    tracemalloc.stop()
+    return tracer
+
+
+def stage(name):
+    if _tracer is None:
+        return contextlib.nullcontext()
+    return _tracer.stage(name)
+
+
+def print_summary(tracer):
+    print(f"{'stage':24} {'count':>6} {'wall':>9} {'cpu':>9} {'peak':>9}")
+    for name, t in tracer.summary().items():
+        print(f"{name:24} {t['count']:6} {t['wall']:8.3f}s {t['cpu']:8.3f}s "
+              f"{t['memory_peak'] / (1024 * 1024):7.1f}MB")
+
+
+def store_trace(filename, tracer):
+    with open(filename, "w") as f:
+        json.dump(tracer.to_dict(), f, indent=2)
@@ -1,6 +1,5 @@
-import dateutil.parser
-
 from cbtk.core import Record, Runner, Suite, Version
+from cbtk.timestamp import parse_timestamp
 
 
 def tags_to_dict(raw, use=None):
@@ -41,10 +40,11 @@ def make_record(suite_name: str,
     if runner_tags is None and use_runner_tags is not None:
         runner_tags = filter_tags(tags, use_runner_tags)
 
-    run_at_ = dateutil.parser.parse(run_at)
+    run_at_ = parse_timestamp(run_at)
 
-    suite = Suite(suite_name, suite_tags)
-    runner = Runner(runner_name, Version.parse(runner_version), runner_tags)
+    suite = Suite.intern(suite_name, suite_tags)
+    runner = Runner.intern(runner_name, Version.parse(runner_version),
+                           runner_tags)
 
     values = {k: {"duration": v} for k, v in durations.items()}
 
@@ -0,0 +1,188 @@
+"""Keep records of a site in memory and republish it when files change.
+
+Records are kept per file and derived structures, timeline charts and
+speedup matrices, per suite. When files are added, changed or removed,
+only those files are loaded and only structures of the suites in them are
+made again. Pages are written through a manifest so that files of other
+suites are not rewritten.
+"""
+import os
+import sqlite3
+import sys
+import time
+
+from cbtk.assets import Assets
+from cbtk.core import groupby
+from cbtk.manifest import Manifest
+from cbtk.pages import PageMaker
+from cbtk.pages.timeline import make_timeline_charts
+from cbtk.speedup import make_speedup_matrices
+
+# errors of a file which may be still being written
+LOAD_ERRORS = (OSError, ValueError, sqlite3.Error)
+
+
+def _stat(filename):
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+class Site:
+    """Records and derived structures of a site.
+
+    load_files is called with a list of filenames and returns a list of
+    records per file. load_db is called with the path of a database.
+    """
+
+    def __init__(self, config, load_files, load_db=None):
+        self.config = config
+        self.load_files = load_files
+        self.load_db = load_db
+        self.stats = {}
+        self.files = {}
+        self.suites = {}
+        self.charts = {}
+        self.matrices = {}
+
+    def _load(self, filenames):
+        """Return records per file of filenames which are loaded.
+
+        A file which fails to load is reported and left out.
+        """
+        db = self.config.db
+        loaded = {}
+        if db is not None and db in filenames:
+            self._try_load(loaded, db, self.load_db)
+            filenames = [f for f in filenames if f != db]
+        try:
+            loaded.update(zip(filenames, self.load_files(filenames)))
+        except LOAD_ERRORS:
+            # load one by one to find which files fail
+            for filename in filenames:
+                self._try_load(loaded, filename,
+                               lambda f: self.load_files([f])[0])
+        return loaded
+
+    @staticmethod
+    def _try_load(loaded, filename, load):
+        try:
+            loaded[filename] = load(filename)
+        except LOAD_ERRORS as e:
+            print(f"failed to load {filename}: {e}", file=sys.stderr)
+
+    def update(self, filenames):
+        """Load new or changed files and remove records of removed ones.
+
+        Returns suites whose records changed.
+        """
+        if self.config.db is not None:
+            filenames = [self.config.db] + list(filenames)
+
+        stats = {f: _stat(f) for f in filenames}
+        stats = {f: st for f, st in stats.items() if st is not None}
+        changed = [f for f in stats if self.stats.get(f) != stats[f]]
+        removed = [f for f in self.files if f not in stats]
+
+        loaded = self._load(changed)
+
+        affected = set()
+        for filename in list(loaded) + removed:
+            affected.update(r.suite for r in self.files.pop(filename, []))
+
+        for filename, records in loaded.items():
+            self.files[filename] = records
+            affected.update(r.suite for r in records)
+
+        # keep files in the order of filenames as load_records does
+        self.files = {f: self.files[f] for f in stats if f in self.files}
+        # a file which failed keeps its old records and is loaded again at
+        # the next update
+        self.stats = {
+            f: st
+            for f, st in stats.items() if f not in changed or f in loaded
+        }
+
+        by_suite = {suite: [] for suite in affected}
+        for records in self.files.values():
+            for record in records:
+                if record.suite in by_suite:
+                    by_suite[record.suite] += [record]
+
+        for suite, records in by_suite.items():
+            self._update_suite(suite, records)
+
+        return affected
+
+    def _update_suite(self, suite, records):
+        if not records:
+            for dic in (self.suites, self.charts, self.matrices):
+                dic.pop(suite, None)
+            return
+
+        # stable, so that ties are in the order of files as in publish
+        records.sort(key=lambda r: r.run_at)
+        self.suites[suite] = records
+        self.charts[suite] = make_timeline_charts(records, self.config)
+        self.matrices[suite] = {
+            hostname: make_speedup_matrices(lst, self.config)
+            for hostname, lst in groupby(records,
+                                         key=lambda r: r.hostname).items()
+        }
+
+    def records(self):
+        return sorted((r for lst in self.files.values() for r in lst),
+                      key=lambda r: r.run_at)
+
+    def publish(self, env, output_dir, manifest):
+        from cbtk.pages import home, runners, timeline
+
+        config = self.config
+        # groupby in publish sorts suites
+        suites = sorted(self.suites)
+        records = self.records()
+
+        matrices_by_host = {}
+        for suite in suites:
+            for hostname, matrices in self.matrices[suite].items():
+                matrices_by_host.setdefault(hostname, {}).update(matrices)
+
+        assets = None
+        if config.fingerprint:
+            assets = Assets(output_dir)
+
+        maker = PageMaker("", env, output_dir, manifest, assets)
+        maker.copy_file(config, "output.css")
+        shown = home.make_page(maker, config, records, matrices_by_host)
+        for lines in shown.values():
+            for line in lines:
+                print(line)
+
+        charts = [c for suite in suites for c in self.charts[suite]]
+        timeline.make_page(maker.subpage("timeline"), config, records,
+                           charts)
+
+        runners.make_page(maker.subpage("runners"), config, records,
+                          matrices_by_host.get(config.hostname, {}))
+
+        if assets is not None:
+            assets.prune(manifest)
+
+
+def watch(config, env, site, list_files, interval, once=False):
+    """Republish the site whenever files given by list_files change."""
+    manifest = Manifest(config.output)
+    while True:
+        affected = site.update(list_files())
+        if affected:
+            start = time.perf_counter()
+            site.publish(env, config.output, manifest)
+            manifest.save()
+            elapsed = time.perf_counter() - start
+            names = ", ".join(sorted(str(s) for s in affected))
+            print(f"published {names} in {elapsed:.2f} sec")
+        if once:
+            return
+        time.sleep(interval)
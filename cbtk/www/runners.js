@@ -1,4 +1,11 @@
-import _data from "./data.json" assert {type: "json"};
+// Name of data.json is given by the page since it has a content hash with
+// --fingerprint. Query of the page, such as ?suite=name given to
+// `cbtk serve`, selects the data.
+const _dataName =
+  document.querySelector('meta[name="cbtk-data"]')?.content ?? "data.json";
+const _data = await fetch(new URL(_dataName + location.search,
+                                  document.baseURI))
+  .then((response) => response.json());
 
 function makeTooltip(context) {
   if (context.raw.duration) {
@@ -1,4 +1,48 @@
-import _data from "./data.json" assert {type: "json"};
+// data.json next to the page, which may be a per-suite page under this
+// script's directory. Its name is given by the page since it has a content
+// hash with --fingerprint. Query of the page, such as ?suite=name given to
+// `cbtk serve`, selects the data.
+const _dataName =
+  document.querySelector('meta[name="cbtk-data"]')?.content ?? "data.json";
+const _data = await fetch(new URL(_dataName + location.search,
+                                  document.baseURI))
+  .then((response) => response.json());
+
+function decodePoints(encoded) {
+  return encoded.x.map((x, i) => ({
+    x: x,
+    y: encoded.y[i],
+    version: encoded.versions[encoded.version[i]],
+    tags: encoded.tags[encoded.tag[i]],
+  }));
+}
+
+// Decode datasets encoded as parallel arrays by --compact-timeline into
+// points in place.
+function decodeConfig(config) {
+  config.data.datasets.forEach((ds) => {
+    if (ds.detail && !Array.isArray(ds.detail))
+      ds.detail = decodePoints(ds.detail);
+
+    if (!("x" in ds))
+      return;
+
+    ds.data = decodePoints(ds);
+
+    delete ds.x;
+    delete ds.y;
+    delete ds.version;
+    delete ds.versions;
+    delete ds.tag;
+    delete ds.tags;
+  });
+  return config;
+}
+
+function getConfig(index) {
+  const config = _data[index];
+  return config ? decodeConfig(config) : config;
+}
 
 function addTooltip(configs) {
   Object.keys(configs).forEach((key) => {
@@ -11,6 +55,8 @@ function addTooltip(configs) {
             `(version: ${context.raw.version})`]
           if (context.raw.tags)
             tooltip.push(`(tags: ${context.raw.tags})`)
+          if (context.raw.change)
+            tooltip.push(`(change: ${context.raw.change})`)
 
           return tooltip
         },
@@ -23,7 +69,7 @@ function initNav() {
   const sections = document.querySelectorAll("[id^='section']");
 
   const nav = document.getElementById("page_nav")
-  const links = nav.querySelectorAll("a")
+  const links = nav.querySelectorAll("a[data-index]")
 
   links.forEach((link) => {
     link.addEventListener("click", (ev) => {
@@ -93,7 +139,7 @@ function initTabs() {
 function initCharts() {
   const elements = document.querySelectorAll(".timeline-chart")
   for (let elem of elements) {
-    let config = _data[elem.dataset.index]
+    let config = getConfig(elem.dataset.index)
     if (config) {
       new Chart(elem, config);
     }
@@ -122,13 +168,20 @@ function initSingleMultiChart(elem) {
 
       title.innerText = link.dataset.bench;
 
-      let config = _data[link.dataset.index];
+      let config = getConfig(link.dataset.index);
       if (config) {
         // deep copy to edit
         config = JSON.parse(JSON.stringify(config));
         config.options.aspectRatio = 2.0
         config.options.plugins.legend.display = true
 
+        // use points for the single chart view if downsampled
+        config.data.datasets.forEach((ds) => {
+          if (ds.detail)
+            ds.data = ds.detail;
+          delete ds.detail;
+        });
+
         if ("chart" in singleDiv) {
           singleDiv.chart.destroy();
         }
@@ -0,0 +1,48 @@
+"""Records and result files shared by tests."""
+import json
+
+from cbtk.core import Record, Runner, Suite, Version
+
+
+def make_record(suite="suite", runner="a", version="1.0.0", run_at=None,
+                durations=None, hostname="host", suite_tags=None,
+                runner_tags=None):
+    durations = {"b": 1.0} if durations is None else durations
+    return Record(suite=Suite.intern(suite, suite_tags),
+                  runner=Runner.intern(runner, Version.parse(version),
+                                       runner_tags),
+                  run_at=run_at,
+                  hostname=hostname,
+                  values={k: {"duration": v} for k, v in durations.items()})
+
+
+def make_raw(suite="s", runner="a", version="1.0.0",
+             run_at="2023-01-01T00:00:00", durations=None, hostname="host",
+             suite_tags=None, runner_tags=None):
+    return {
+        "metadata": {
+            "suite": {"name": suite, "tags": suite_tags},
+            "runner": {"name": runner, "version": version,
+                       "tags": runner_tags},
+            "hostname": hostname,
+            "run_at": run_at,
+        },
+        "duration": {"b": 1} if durations is None else durations,
+    }
+
+
+def write_result(path, records):
+    with open(path, "w") as f:
+        json.dump({"version": "1.0.0", "records": records}, f)
+
+
+def make_data_dir(path):
+    """Write result files of runners a and b of suite s to path."""
+    path.mkdir(exist_ok=True)
+    for day in range(1, 5):
+        write_result(path / f"{day}.json", [
+            make_raw("s", "a", "1.0.0", f"2023-01-0{day}T00:00:00", {"b": 1}),
+            make_raw("s", "b", "1.0.0", f"2023-01-0{5 - day}T00:00:00",
+                     {"b": 2}),
+        ])
+    return path
@@ -0,0 +1,86 @@
+import datetime
+
+import pytest
+
+from cbtk.archive import (SegmentFile, load_segment, segment_files,
+                          write_segment)
+from cbtk.filter import RecordFilter
+from cbtk.main import record_to_dict
+from tests.helpers import make_record
+
+
+def make_archived_record(hostname, run_at, durations):
+    return make_record(suite_tags="a=1", runner="runner",
+                       version="1.2.3.dev4", run_at=run_at,
+                       durations=durations, hostname=hostname)
+
+
+RECORDS = [
+    make_archived_record(
+        "h0",
+        datetime.datetime(2023, 1, 1, 0, 0, 0, 123456,
+                          tzinfo=datetime.timezone.utc), {
+        "b0": 1.5,
+        "b1": 2.0
+    }),
+    make_archived_record(
+        "h1",
+        datetime.datetime(2023, 1, 2, tzinfo=datetime.timezone(
+            datetime.timedelta(hours=-5))), {"b1": 3.0}),
+]
+
+
+def test_roundtrip(tmp_path):
+    filename = str(tmp_path / "a.cbtk")
+    write_segment(filename, RECORDS)
+    assert ([record_to_dict(r) for r in load_segment(filename)] ==
+            [record_to_dict(r) for r in RECORDS])
+
+
+def test_filter_hostname(tmp_path):
+    filename = str(tmp_path / "a.cbtk")
+    write_segment(filename, RECORDS)
+    with SegmentFile(filename) as segment:
+        assert len(segment) == 2
+        records = list(segment.iter_records(RecordFilter(hostname="h1")))
+        assert [r.hostname for r in records] == ["h1"]
+        assert list(segment.iter_records(RecordFilter(hostname="h2"))) == []
+
+
+def test_filter_run_at(tmp_path):
+    filename = str(tmp_path / "a.cbtk")
+    write_segment(filename, RECORDS)
+    since = datetime.datetime(2023, 1, 2, 5)
+    assert [r.hostname for r in load_segment(
+        filename, RecordFilter(since=since))] == ["h1"]
+    assert [r.hostname for r in load_segment(
+        filename, RecordFilter(until=since))] == ["h0", "h1"]
+
+
+def test_append(tmp_path):
+    filename = str(tmp_path / "a.cbtk")
+    write_segment(filename, RECORDS[1:], [str(tmp_path / "1.json")])
+    write_segment(filename, RECORDS[:1], [str(tmp_path / "sub/0.json")],
+                  append=True)
+    assert ([record_to_dict(r) for r in load_segment(filename)] ==
+            [record_to_dict(r) for r in RECORDS])
+    assert segment_files(filename) == [
+        str(tmp_path / "1.json"), str(tmp_path / "sub" / "0.json")]
+
+
+def test_empty_file(tmp_path):
+    filename = tmp_path / "a.cbtk"
+    filename.touch()
+    assert load_segment(str(filename)) == []
+    assert segment_files(str(filename)) == []
+
+
+def test_truncated_file(tmp_path):
+    filename = str(tmp_path / "a.cbtk")
+    write_segment(filename, RECORDS)
+    with open(filename, "rb") as f:
+        data = f.read()
+    with open(filename, "wb") as f:
+        f.write(data[:-8])
+    with pytest.raises(ValueError):
+        load_segment(filename)
@@ -0,0 +1,53 @@
+import gzip
+import os
+
+from cbtk.assets import Assets, compress, fingerprint_name
+
+
+def test_fingerprint_name():
+    name = fingerprint_name("a/b.js", "0123456789abcdef")
+    assert name == "a/b.0123456789.js"
+
+
+def test_assets_url(tmp_path):
+    root = str(tmp_path)
+    (tmp_path / "timeline").mkdir()
+    hashed = tmp_path / "timeline" / "timeline.0123456789.js"
+    hashed.write_text("x")
+
+    assets = Assets(root)
+    assets.add(str(tmp_path / "timeline" / "timeline.js"), str(hashed))
+
+    timeline = str(tmp_path / "timeline")
+    assert assets.url(timeline, "timeline.js") == "timeline.0123456789.js"
+    assert assets.url(timeline + "/s1", "../timeline.js") == (
+        "../timeline.0123456789.js")
+    assert assets.url(timeline, "data.json") == "data.json"
+    assert assets.root_url("timeline/timeline.js") == (
+        "timeline/timeline.0123456789.js")
+
+
+def test_prune(tmp_path):
+    path = str(tmp_path / "data.json")
+    for digest in ["0123456789", "abcdefabcd"]:
+        hashed = fingerprint_name(path, digest)
+        with open(hashed, "w") as f:
+            f.write(digest)
+        compress(hashed)
+    (tmp_path / "data.x123456789.json").write_text("not fingerprinted")
+
+    assets = Assets(str(tmp_path))
+    assets.add(path, fingerprint_name(path, "abcdefabcd"))
+    assert assets.prune() == [fingerprint_name(path, "0123456789")]
+    assert sorted(os.listdir(tmp_path)) == [
+        "data.abcdefabcd.json", "data.abcdefabcd.json.gz",
+        "data.x123456789.json"]
+
+
+def test_compress(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b"[1, 2, 3]")
+    compress(str(path))
+
+    with gzip.open(str(path) + ".gz") as f:
+        assert f.read() == b"[1, 2, 3]"
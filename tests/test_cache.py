@@ -0,0 +1,41 @@
+import os
+
+from cbtk.cache import RecordCache
+
+
+def test_load_cached(tmp_path):
+    src = tmp_path / "a.json"
+    src.write_text("x")
+    cache = RecordCache(tmp_path / "cache", "1.0.0")
+
+    calls = []
+
+    def loader(filename):
+        calls.append(filename)
+        return [len(calls)]
+
+    assert cache.load(src, loader) == [1]
+    assert cache.load(src, loader) == [1]
+    assert len(calls) == 1
+
+
+def test_load_modified(tmp_path):
+    src = tmp_path / "a.json"
+    src.write_text("x")
+    cache = RecordCache(tmp_path / "cache", "1.0.0")
+
+    assert cache.load(src, lambda f: ["old"]) == ["old"]
+    src.write_text("xy")
+    assert cache.load(src, lambda f: ["new"]) == ["new"]
+
+
+def test_prune(tmp_path):
+    cache = RecordCache(tmp_path / "cache", "1.0.0", max_size=0)
+    for name in ["a", "b"]:
+        src = tmp_path / name
+        src.write_text(name)
+        cache.load(src, lambda f: [name])
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+    cache.prune()
+    assert len(os.listdir(tmp_path / "cache")) == 0
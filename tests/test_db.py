@@ -0,0 +1,86 @@
+import pytest
+
+from cbtk.db import ingest, load_db
+from cbtk.filter import RecordFilter
+from cbtk.main import load_files, record_to_dict
+from tests import helpers
+
+
+def write_result(path, hostname, run_at, durations):
+    helpers.write_result(path, [
+        helpers.make_raw("s", "r", "1.0.0", run_at, durations,
+                         hostname=hostname, runner_tags="a=1")
+    ])
+
+
+def test_ingest(tmp_path):
+    db = str(tmp_path / "a.db")
+    files = [str(tmp_path / "0.json"), str(tmp_path / "1.json")]
+    write_result(files[0], "h0", "2023-01-02T00:00:00+00:00", {"b": 1.5})
+    write_result(files[1], "h1", "2023-01-01T00:00:00+00:00", {"b": 2.5})
+
+    assert ingest(db, files, load_files) == 2
+    assert ingest(db, files, load_files) == 0
+
+    records = load_db(db)
+    expected = sum(load_files(files[::-1]), [])
+    assert ([record_to_dict(r) for r in records] ==
+            [record_to_dict(r) for r in expected])
+
+
+def test_ingest_changed(tmp_path):
+    db = str(tmp_path / "a.db")
+    filename = str(tmp_path / "0.json")
+    write_result(filename, "h0", "2023-01-01T00:00:00+00:00", {"b": 1.5})
+    ingest(db, [filename], load_files)
+
+    write_result(filename, "h0", "2023-01-01T00:00:00+00:00", {
+        "b": 3.0,
+        "c": 1
+    })
+    assert ingest(db, [filename], load_files) == 1
+
+    records = load_db(db)
+    assert len(records) == 1
+    assert records[0].get_values_by_metric("duration") == {"b": 3.0, "c": 1}
+
+
+def test_load_db_hostname(tmp_path):
+    db = str(tmp_path / "a.db")
+    files = [str(tmp_path / "0.json"), str(tmp_path / "1.json")]
+    write_result(files[0], "h0", "2023-01-01T00:00:00+00:00", {"b": 1.5})
+    write_result(files[1], "h1", "2023-01-01T00:00:00+00:00", {"b": 2.5})
+    ingest(db, files, load_files)
+
+    records = load_db(db, RecordFilter(hostname="h1"))
+    assert [r.hostname for r in records] == ["h1"]
+
+
+def test_ingest_roundtrip_values(tmp_path):
+    db = str(tmp_path / "a.db")
+    files = [str(tmp_path / "0.json"), str(tmp_path / "1.json")]
+    write_result(files[0], "h0", "2023-01-01T00:00:00+00:00", {
+        "b": 1,
+        "c": 2.0
+    })
+    write_result(files[1], "h0", "2023-01-02T00:00:00+00:00", {})
+    ingest(db, files, load_files)
+
+    expected = sum(load_files(files), [])
+    assert ([record_to_dict(r) for r in load_db(db)] ==
+            [record_to_dict(r) for r in expected])
+    assert type(load_db(db)[0].value("duration", "b")) is int
+
+
+def test_load_db_missing(tmp_path):
+    db = tmp_path / "missing.db"
+    with pytest.raises(FileNotFoundError):
+        load_db(str(db))
+    assert not db.exists()
+
+
+def test_load_db_not_ingested(tmp_path):
+    db = tmp_path / "empty.db"
+    db.write_bytes(b"")
+    with pytest.raises(ValueError):
+        load_db(str(db))
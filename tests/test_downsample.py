@@ -0,0 +1,20 @@
+from cbtk.downsample import downsample, lttb
+
+
+def test_lttb():
+    xs = list(range(100))
+    ys = [0.0] * 100
+    ys[42] = 10.0
+    indices = lttb(xs, ys, 10)
+    assert len(indices) == 10
+    assert indices[0] == 0 and indices[-1] == 99
+    assert 42 in indices
+    assert indices == sorted(indices)
+
+
+def test_lttb_small():
+    assert lttb([0, 1, 2], [0, 1, 2], 10) == [0, 1, 2]
+
+
+def test_downsample_disabled():
+    assert downsample([0, 1, 2], [0, 1, 2], 0) == [0, 1, 2]
@@ -0,0 +1,41 @@
+import datetime
+
+from cbtk.core import Version
+from cbtk.filter import RecordFilter
+from tests import helpers
+
+
+def make_raw(suite="s", runner="r", version="1.0.0",
+             run_at="2023-01-02T00:00:00+00:00"):
+    return helpers.make_raw(suite, runner, version, run_at, {},
+                            hostname="h", suite_tags="a=1")
+
+
+def test_empty():
+    assert RecordFilter().match_raw(make_raw())
+
+
+def test_names():
+    f = RecordFilter(hostname="h", suites=["x*", "s"], suite_tags="a=*",
+                     runners=["r*"])
+    assert f.match_raw(make_raw())
+    assert not f.match_raw(make_raw(suite="t"))
+    assert not f.match_raw(make_raw(runner="q"))
+    assert not RecordFilter(hostname="g").match_raw(make_raw())
+
+
+def test_version():
+    f = RecordFilter(min_version=Version.parse("1.0.0.dev2"),
+                     max_version=Version.parse("1.0.0"))
+    assert f.match_raw(make_raw(version="1.0.0"))
+    assert f.match_raw(make_raw(version="1.0.0.dev2"))
+    assert not f.match_raw(make_raw(version="1.0.0.dev1"))
+    assert not f.match_raw(make_raw(version="1.0.1"))
+
+
+def test_run_at():
+    f = RecordFilter(since=datetime.datetime(2023, 1, 2),
+                     until=datetime.datetime(2023, 1, 3))
+    assert f.match_raw(make_raw())
+    assert f.match_raw(make_raw(run_at="2023-01-03T09:00:00+09:00"))
+    assert not f.match_raw(make_raw(run_at="2023-01-01T23:59:59+00:00"))
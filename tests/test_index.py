@@ -0,0 +1,53 @@
+import argparse
+
+import pytest
+
+from cbtk.index import RecordIndex
+from cbtk.main import load_directory
+from cbtk.pages.timeline import make_timeline_charts
+from cbtk.speedup import make_speedup_matrices
+from tests.helpers import make_data_dir, make_raw, write_result
+
+
+def test_record_index(tmp_path):
+    records = load_directory(make_data_dir(tmp_path))
+    index = RecordIndex(records)
+
+    assert index.hostnames == ["host"]
+    assert sum(len(lst) for lst in index.by_runner.values()) == len(records)
+    assert list(index.by_benchmark) == ["b"]
+    for lst in index.by_suite.values():
+        assert lst == sorted(lst, key=lambda r: r.run_at)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_record_index_pages(tmp_path, jobs):
+    # two suites, so that jobs=2 uses a process pool
+    make_data_dir(tmp_path)
+    write_result(tmp_path / "t.json", [
+        make_raw("t", "a", "1.0.0", "2023-01-01T00:00:00", {"b": 1}),
+        make_raw("t", "b", "1.0.0", "2023-01-02T00:00:00", {"b": 3}),
+    ])
+    records = load_directory(tmp_path)
+    index = RecordIndex(records)
+    config = argparse.Namespace(geomean=False, jobs=jobs)
+
+    matrices = index.speedup_matrices(config)
+    assert index.speedup_matrices(config, "host") is matrices
+
+    expected = make_speedup_matrices(records, config)
+    assert list(matrices) == list(expected)
+    for suite, matrix in matrices.items():
+        runners = matrix.runners()
+        assert runners == expected[suite].runners()
+        for r0 in runners:
+            for r1 in runners:
+                assert (matrix.get(r0, r1).value("_speedup", "_average") ==
+                        expected[suite].get(r0, r1).value(
+                            "_speedup", "_average"))
+
+    def key(chart):
+        return (chart.chart_id, [ser.points for ser in chart.records])
+
+    assert ([key(c) for c in make_timeline_charts(records, config, index)]
+            == [key(c) for c in make_timeline_charts(records, config)])
@@ -0,0 +1,85 @@
+import io
+import json
+
+import pytest
+
+from cbtk.jsonstream import (encode, iter_encode_array, iter_encode_object,
+                             iter_items)
+
+
+def stream(obj, **kwargs):
+    return io.StringIO(json.dumps(obj, **kwargs))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+def test_iter_items(chunk_size):
+    obj = {
+        "version": "1.0.0",
+        "records": [{"a": [1, 2.5, "x\"y"]}, 12345, None, {}],
+        "after": {"b": 1},
+    }
+    items = iter_items(stream(obj, indent=2), "records", chunk_size=chunk_size)
+    assert list(items) == obj["records"]
+
+
+def test_iter_items_empty():
+    assert list(iter_items(stream({"records": []}), "records")) == []
+
+
+def test_iter_items_check():
+    headers = []
+    items = iter_items(stream({"version": "1.0.0", "records": [1]}), "records",
+                       check=headers.append)
+    assert list(items) == [1]
+    assert headers == [{"version": "1.0.0"}]
+
+
+def test_iter_items_required_after_array():
+    headers = []
+    text = '{"records": [1, 2], "version": "1.0.0"}'
+    items = iter_items(io.StringIO(text), "records", check=headers.append,
+                       required=("version", ), chunk_size=4)
+    assert next(items) == 1
+    assert headers == [{"version": "1.0.0"}]
+    assert list(items) == [2]
+
+
+def test_iter_items_missing():
+    with pytest.raises(ValueError):
+        list(iter_items(stream({"version": "1.0.0"}), "records"))
+
+
+def test_iter_items_truncated():
+    with pytest.raises(ValueError):
+        list(iter_items(io.StringIO('{"records": [1, 2'), "records"))
+
+
+def test_iter_encode_same_as_dumps():
+    values = [{"a": [1, 2, {"b": "x\ny"}]}, 3, "s", [], {}]
+    items = [(str(i), v) for i, v in enumerate(values)]
+
+    for indent in (2, 4):
+        assert "".join(iter_encode_array(values, indent)) == json.dumps(
+            values, indent=indent)
+        assert "".join(iter_encode_object(items, indent)) == json.dumps(
+            dict(items), indent=indent)
+
+    compact = (",", ":")
+    assert "".join(iter_encode_array(values)) == json.dumps(
+        values, separators=compact)
+    assert "".join(iter_encode_object(items)) == json.dumps(
+        dict(items), separators=compact)
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_encode_raw(indent):
+    values = [{"a": [1, {"b": "x\ny"}]}, 3]
+    raw = [encode(v, indent) for v in values]
+    assert ("".join(iter_encode_array(raw, indent)) ==
+            "".join(iter_encode_array(values, indent)))
+
+
+def test_iter_encode_empty():
+    assert "".join(iter_encode_array([], 2)) == "[]"
+    assert "".join(iter_encode_object([], 2)) == "{}"
+    assert "".join(iter_encode_array([])) == "[]"
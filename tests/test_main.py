@@ -0,0 +1,223 @@
+import datetime
+import json
+import shutil
+
+import pytest
+
+import cbtk.www
+from cbtk import main as cbtk_main
+from cbtk.main import (find_result_files, iter_file, load_directory,
+                       load_file, main, sort_by_run_at)
+from tests.helpers import make_data_dir, make_raw, write_result
+
+
+def test_load_directory_sorted(tmp_path):
+    records = load_directory(make_data_dir(tmp_path))
+    assert len(records) == 8
+    assert records == sorted(records, key=lambda r: r.run_at)
+
+
+def test_load_directory_jobs(tmp_path):
+    data_dir = make_data_dir(tmp_path)
+    serial = load_directory(data_dir)
+    parallel = load_directory(data_dir, jobs=2)
+
+    def key(record):
+        return (record.run_at, record.runner.name, record.benchmarks)
+
+    assert [key(r) for r in parallel] == [key(r) for r in serial]
+
+
+def test_iter_file(tmp_path):
+    data_dir = make_data_dir(tmp_path)
+    filename = data_dir / "1.json"
+    assert ([r.run_at for r in sort_by_run_at(iter_file(filename))] ==
+            [r.run_at for r in load_file(filename)])
+
+
+@pytest.mark.parametrize("threshold", [0, 1 << 30])
+def test_load_file_version_after_records(tmp_path, monkeypatch, threshold):
+    monkeypatch.setattr(cbtk_main, "STREAM_THRESHOLD", threshold)
+    raw = make_raw("s", "a", "1.0.0", "2023-01-01T00:00:00", {"b": 1})
+    filename = tmp_path / "1.json"
+    filename.write_text(json.dumps({"records": [raw], "version": "1.0.0"}))
+    assert [r.benchmarks for r in load_file(filename)] == [["b"]]
+
+    filename.write_text(json.dumps({"records": [raw], "version": "0.1"}))
+    with pytest.raises(ValueError, match="unsupported format version"):
+        load_file(filename)
+
+
+def test_publish_all_hosts(tmp_path, capsys):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for i, host in enumerate(["h1", "h/2"]):
+        raw = make_raw("s", "a", "1.0.0", f"2023-01-0{i + 1}T00:00:00",
+                       {"b": 1})
+        raw["metadata"]["hostname"] = host
+        write_result(data_dir / f"{i}.json", [raw])
+
+    output = tmp_path / "public"
+    main(["publish", "-d", str(data_dir), "-o", str(output),
+          "--runner-order", "a", "--all-hosts"])
+
+    index = (output / "index.html").read_text()
+    assert 'href="h1/"' in index and 'href="h_2/"' in index
+    assert "/timeline/" not in index and "/runners/" not in index
+    for dirname in ["h1", "h_2"]:
+        assert (output / dirname / "timeline" / "data.json").exists()
+        assert (output / dirname / "runners" / "index.html").exists()
+
+
+def test_publish_incremental_unchanged(tmp_path, capsys):
+    data_dir = make_data_dir(tmp_path / "data")
+    output = tmp_path / "public"
+    argv = ["publish", "-d", str(data_dir), "-o", str(output),
+            "--runner-order", "a,b", "--hostname", "host", "--incremental"]
+
+    main(argv)
+    capsys.readouterr()
+    main(argv)
+    assert "have not changed" in capsys.readouterr().out
+
+    write_result(data_dir / "5.json", [
+        make_raw("s", "a", "1.0.0", "2023-01-05T00:00:00", {"b": 3}),
+    ])
+    main(argv)
+    assert "have not changed" not in capsys.readouterr().out
+    assert "2023-01-05" in (output / "timeline" / "data.json").read_text()
+
+    (output / "runners" / "index.html").unlink()
+    main(argv)
+    assert (output / "runners" / "index.html").exists()
+
+
+def test_publish_incremental_suites(tmp_path, capsys, monkeypatch):
+    import cbtk.pages.fragments
+    import cbtk.pages.timeline
+
+    data_dir = make_data_dir(tmp_path / "data")
+    write_result(data_dir / "t.json", [
+        make_raw("t", "a", "1.0.0", "2023-01-01T00:00:00", {"c": 1}),
+        make_raw("t", "b", "1.0.0", "2023-01-02T00:00:00", {"c": 2}),
+    ])
+    argv = ["publish", "-d", str(data_dir), "--runner-order", "a,b",
+            "--hostname", "host"]
+    output = tmp_path / "public"
+    main(argv + ["-o", str(output), "--incremental"])
+
+    built = []
+    for module, name in [(cbtk.pages.fragments, "make_speedup_matrices"),
+                         (cbtk.pages.timeline, "make_timeline_charts")]:
+
+        def spy(records, *args, _func=getattr(module, name), **kwargs):
+            built.extend({r.suite.name for r in records})
+            return _func(records, *args, **kwargs)
+
+        monkeypatch.setattr(module, name, spy)
+
+    write_result(data_dir / "5.json", [
+        make_raw("s", "a", "1.0.0", "2023-01-05T00:00:00", {"b": 3}),
+    ])
+    capsys.readouterr()
+    main(argv + ["-o", str(output), "--incremental"])
+    incremental = capsys.readouterr().out
+    assert set(built) == {"s"}
+
+    expected = tmp_path / "expected"
+    main(argv + ["-o", str(expected)])
+    assert capsys.readouterr().out.replace(str(expected), "") == \
+        incremental.replace(str(output), "")
+
+    def read(path):
+        return [line for line in path.read_text().splitlines()
+                if "Generated at" not in line]
+
+    for name in ["index.html", "runners/data.json", "runners/index.html",
+                 "timeline/data.json", "timeline/index.html"]:
+        assert read(output / name) == read(expected / name)
+    assert len(list((output / ".cbtk-fragments").iterdir())) == 6
+
+
+def test_compact_into_data_dir(tmp_path, capsys):
+    data_dir = make_data_dir(tmp_path / "data")
+    output = data_dir / "sub" / "all.cbtk"
+    output.parent.mkdir()
+    argv = ["compact", "-d", str(data_dir), "-o", str(output)]
+    main(argv)
+    assert find_result_files(str(data_dir)) == [str(output)]
+    assert len(load_directory(data_dir)) == 8
+
+    write_result(data_dir / "5.json", [
+        make_raw("s", "a", "1.0.0", "2023-01-05T00:00:00", {"b": 1})])
+    assert len(load_directory(data_dir)) == 9
+    capsys.readouterr()
+    main(argv)
+    assert "appended 1 records of 1 files" in capsys.readouterr().out
+    assert len(load_directory(data_dir)) == 9
+
+    size = output.stat().st_size
+    main(argv)
+    assert output.stat().st_size == size
+
+
+def test_regressions_state(tmp_path, capsys):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    ys = [1.0, 1.02, 0.98, 1.01, 0.99] * 4 + [1.5, 1.52, 1.48, 1.51] * 3
+
+    def write_days(days):
+        for day in days:
+            run_at = (datetime.datetime(2023, 1, 1) +
+                      datetime.timedelta(days=day)).isoformat()
+            write_result(data_dir / f"{day}.json",
+                         [make_raw("s", "a", f"1.0.0.dev{day}", run_at,
+                                   {"b": ys[day]})])
+
+    state = str(tmp_path / "state.json")
+    argv = ["regressions", "-d", str(data_dir), "--state", state]
+    write_days(range(22))
+    main(argv)
+    capsys.readouterr()
+
+    write_days(range(22, len(ys)))
+    main(argv)
+    resumed = capsys.readouterr().out
+    main(["regressions", "-d", str(data_dir)])
+    assert resumed == capsys.readouterr().out
+    assert "1.0.0.dev20" in resumed
+
+
+def test_publish_fingerprint_prunes(tmp_path, capsys):
+    data_dir = make_data_dir(tmp_path / "data")
+    output = tmp_path / "public"
+    resource_dir = tmp_path / "www"
+    shutil.copytree(cbtk.www.__path__[0], resource_dir)
+    argv = ["publish", "-d", str(data_dir), "-o", str(output), "-r",
+            str(resource_dir), "--runner-order", "a,b", "--hostname",
+            "host", "--fingerprint", "--incremental"]
+
+    def hashed(name):
+        return sorted(p.name for p in (output / "timeline").iterdir()
+                      if p.name.startswith(name + "."))
+
+    main(argv)
+    old = hashed("data") + hashed("timeline")
+
+    write_result(data_dir / "5.json", [
+        make_raw("s", "a", "1.0.0", "2023-01-05T00:00:00", {"b": 3}),
+    ])
+    with open(resource_dir / "timeline.js", "a") as f:
+        f.write("\n")
+    main(argv)
+
+    for name in ["data", "timeline"]:
+        files = hashed(name)
+        assert len(files) == 2 and files[1] == files[0] + ".gz"
+        assert not set(files) & set(old)
+        assert files[0] in (output / "timeline" / "index.html").read_text()
+
+    # removed files are dropped from the manifest too
+    capsys.readouterr()
+    main(argv)
+    assert "have not changed" in capsys.readouterr().out
@@ -0,0 +1,52 @@
+import os
+
+from cbtk.manifest import Manifest, digest_bytes
+
+
+def write(manifest, path, data):
+    digest = digest_bytes(data)
+    if manifest.is_fresh(path, digest):
+        return False
+    path.write_bytes(data)
+    manifest.update(path, digest)
+    return True
+
+
+def test_fresh(tmp_path):
+    manifest = Manifest(tmp_path)
+    path = tmp_path / "a.json"
+    assert write(manifest, path, b"a")
+    manifest.save()
+
+    manifest = Manifest(tmp_path)
+    assert not write(manifest, path, b"a")
+    assert write(manifest, path, b"b")
+
+
+def test_modified_on_disk(tmp_path):
+    manifest = Manifest(tmp_path)
+    path = tmp_path / "a.json"
+    assert write(manifest, path, b"a")
+
+    path.write_bytes(b"xyz")
+    assert write(manifest, path, b"a")
+    assert path.read_bytes() == b"a"
+
+
+def test_unchanged(tmp_path):
+    manifest = Manifest(tmp_path)
+    path = tmp_path / "a.json"
+    write(manifest, path, b"a")
+    manifest.set_inputs("x")
+    manifest.save()
+
+    manifest = Manifest(tmp_path)
+    assert manifest.is_unchanged("x")
+    assert not manifest.is_unchanged("y")
+    path.write_bytes(b"xyz")
+    assert not manifest.is_unchanged("x")
+
+
+def test_save_unmodified(tmp_path):
+    Manifest(tmp_path).save()
+    assert not os.path.exists(tmp_path / Manifest.FILENAME)
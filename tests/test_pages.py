@@ -0,0 +1,34 @@
+import argparse
+
+import jinja2
+
+from cbtk.manifest import Manifest
+from cbtk.pages import GENERATED_AT, PageMaker
+
+
+def make_env():
+    return jinja2.Environment(loader=jinja2.DictLoader({
+        "index.html": "{{ site_title }}:{% include contents_template %}"
+                      ":{{ generated_at }}",
+        "body.html": "{% for x in items %}<{{ x }}>{% endfor %}",
+    }), autoescape=True)
+
+
+def test_write_page(tmp_path):
+    config = argparse.Namespace(title="T", base_url="")
+    manifest = Manifest(str(tmp_path))
+    maker = PageMaker("", make_env(), str(tmp_path), manifest)
+
+    maker.write_page("index.html", config, contents_template="body.html",
+                     items=["a", "&"])
+    text = (tmp_path / "index.html").read_text()
+    assert text.startswith("T:<a><&amp;>:")
+    assert GENERATED_AT not in text
+    assert not (tmp_path / "index.html.tmp").exists()
+
+    # unchanged page is not rewritten
+    mtime = (tmp_path / "index.html").stat().st_mtime_ns
+    maker.write_page("index.html", config, contents_template="body.html",
+                     items=["a", "&"])
+    assert (tmp_path / "index.html").stat().st_mtime_ns == mtime
+    assert not (tmp_path / "index.html.tmp").exists()
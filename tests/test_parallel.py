@@ -0,0 +1,31 @@
+import argparse
+import datetime
+
+from cbtk.pages.timeline import make_timeline_charts
+from cbtk.parallel import map_by_suite
+from tests.helpers import make_record
+
+
+def names(records):
+    return [(r.suite.name, r.run_at) for r in records]
+
+
+def test_map_by_suite():
+    records = [make_record(s, run_at=i) for i, s in enumerate("bab")]
+    expected = [[("a", 1)], [("b", 0), ("b", 2)]]
+    assert map_by_suite(names, records) == expected
+    assert map_by_suite(names, records, jobs=2) == expected
+
+
+def test_timeline_charts_in_serial_order():
+    # host "h2" has a benchmark which "h1" does not have
+    run_at = datetime.datetime(2023, 1, 1)
+    records = [
+        make_record("s", hostname="h1", run_at=run_at, durations={"b": 1.0}),
+        make_record("t", hostname="h1", run_at=run_at, durations={"b": 1.0}),
+        make_record("s", hostname="h2", run_at=run_at, durations={"c": 1.0}),
+    ]
+    serial = make_timeline_charts(records, argparse.Namespace(jobs=1))
+    parallel = make_timeline_charts(records, argparse.Namespace(jobs=2))
+    assert ([c.chart_id for c in parallel] ==
+            [c.chart_id for c in serial] == ["s/a/b", "t/a/b", "s/a/c"])
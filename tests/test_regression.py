@@ -0,0 +1,42 @@
+import datetime
+
+from cbtk.regression import ChangePointDetector, detect_changes
+
+
+def make_points(ys):
+    t0 = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+    return [{
+        "x": (t0 + datetime.timedelta(days=i)).isoformat(),
+        "y": y,
+        "version": f"1.0.{i}",
+        "tags": None,
+    } for i, y in enumerate(ys)]
+
+
+def test_detect_changes_step():
+    ys = [1.0, 1.02, 0.98, 1.01, 0.99] * 4 + [1.5, 1.52, 1.48, 1.51] * 3
+    changes = detect_changes(make_points(ys))
+
+    assert len(changes) == 1
+    assert changes[0]["version"] == "1.0.20"
+    assert abs(changes[0]["magnitude"] - 0.5) < 0.05
+
+
+def test_detect_changes_flat():
+    ys = [1.0, 1.02, 0.98, 1.01, 0.99] * 10
+    assert detect_changes(make_points(ys)) == []
+
+
+def test_detector_resume():
+    ys = [1.0, 1.02, 0.98, 1.01, 0.99] * 4 + [0.6, 0.61, 0.59] * 4
+    points = make_points(ys)
+
+    detector = ChangePointDetector()
+    for point in points[:22]:
+        detector.add(point)
+    detector = ChangePointDetector.from_dict(detector.to_dict())
+    for point in points[22:]:
+        detector.add(point)
+
+    assert detector.changes == detect_changes(points)
+    assert len(detector.changes) == 1
@@ -0,0 +1,116 @@
+import argparse
+import http.client
+import threading
+
+import pytest
+
+import cbtk.www
+from cbtk.main import load_directory, prepare_site
+from cbtk.serve import LRUCache, Views, make_server, parse_etags, parse_path
+from tests.helpers import make_data_dir
+
+
+def make_views(tmp_path, **kwargs):
+    options = dict(
+        resource_dir=None, base_url="", runner_order="a",
+        runner_display_order=None, title="T", geomean=False, hostname=None,
+        compact_timeline=False, compact_json=False, timeline_points=0,
+        timeline_detail_points=0, show_regressions=False,
+        split_timeline=False, cache_dir=None)
+    options.update(kwargs)
+    config = argparse.Namespace(**options)
+    env = prepare_site(config)
+    records = load_directory(make_data_dir(tmp_path))
+    return Views(config, env, records, 8)
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_parse_path():
+    assert parse_path("/") == ("", "index.html", {})
+    assert parse_path("/output.css") == ("", "output.css", {})
+    assert parse_path("/timeline/?suite=s1&runner=a") == (
+        "timeline", "index.html", {"suite": "s1", "runner": "a"})
+    assert parse_path("/runners/data.json?host=h") == (
+        "runners", "data.json", {"host": "h"})
+    assert parse_path("/timeline") == ("timeline", "index.html", {})
+    assert parse_path("/timeline/s/") == ("timeline", "s/index.html", {})
+
+
+def test_parse_etags():
+    assert parse_etags('"a"') == ['"a"']
+    assert parse_etags('"a", W/"b",,"c"') == ['"a"', '"b"', '"c"']
+    assert parse_etags(' * ') is None
+
+
+def test_views_make(tmp_path, capsys):
+    views = make_views(tmp_path)
+
+    for page in ("", "timeline", "runners"):
+        files = views.get(page, {})
+        assert "index.html" in files
+    assert "data.json" in views.get("timeline", {"suite": "s"})
+    assert views.get_resource("timeline.js") is not None
+    assert views.config.resource_dir == cbtk.www.__path__[0]
+    assert capsys.readouterr().out == ""
+
+
+def test_views_split_timeline(tmp_path):
+    views = make_views(tmp_path, split_timeline=True)
+    files = views.get("timeline", {})
+    assert {"index.html", "s/index.html", "s/data.json"} <= set(files)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = make_server(("127.0.0.1", 0), make_views(tmp_path), "now")
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def request(server, method, path, headers=None):
+    conn = http.client.HTTPConnection(*server.server_address)
+    try:
+        conn.request(method, path, headers=headers or {})
+        response = conn.getresponse()
+        return response, response.read()
+    finally:
+        conn.close()
+
+
+def test_handler(server):
+    response, body = request(server, "GET", "/timeline/data.json")
+    assert response.status == 200
+    assert body and int(response.getheader("Content-Length")) == len(body)
+    etag = response.getheader("ETag")
+
+    for header in [etag, f'"x", {etag}', f"W/{etag}", "*"]:
+        response, body = request(server, "GET", "/timeline/data.json",
+                                 {"If-None-Match": header})
+        assert response.status == 304 and body == b""
+
+    response, _ = request(server, "GET", "/timeline/data.json",
+                          {"If-None-Match": '"x"'})
+    assert response.status == 200
+
+    response, body = request(server, "HEAD", "/timeline/")
+    assert response.status == 200 and body == b""
+    assert int(response.getheader("Content-Length")) > 0
+
+    response, _ = request(server, "GET", "/missing.js")
+    assert response.status == 404
@@ -0,0 +1,44 @@
+import itertools
+
+import pytest
+
+from cbtk.speedup import SpeedupRecord, SpeedupTable, make_speedup_record
+from tests.helpers import make_record
+
+RECORDS = [
+    make_record(runner="a", durations={"b0": 1.0, "b1": 2.0, "b2": 3.0}),
+    make_record(runner="b", durations={"b0": 2.0, "b1": 1.5, "b2": 0.5}),
+    make_record(runner="c", durations={"b1": 4.0, "b3": 1.0}),
+]
+
+
+@pytest.mark.parametrize("use_geomean", [False, True])
+def test_speedup_table(use_geomean):
+    table = SpeedupTable(RECORDS)
+    for i0, i1 in itertools.product(range(len(RECORDS)), repeat=2):
+        base_durs = RECORDS[i0].get_values_by_metric("duration")
+        expected = make_speedup_record(RECORDS[i1], base_durs, use_geomean)
+
+        average = table.average(i0, i1, use_geomean)
+        record = SpeedupRecord(table, i0, i1, average)
+
+        assert record.benchmarks == expected.benchmarks
+        actual = record.get_values_by_metric("_speedup")
+        for name, value in expected.get_values_by_metric("_speedup").items():
+            assert actual[name] == pytest.approx(value)
+        assert record.get_values_by_bench("b1") == pytest.approx(
+            expected.get_values_by_bench("b1"))
+
+
+def test_speedup_table_zero_duration():
+    records = [
+        make_record(runner="a", durations={"b0": 0.0, "b1": 2.0}),
+        make_record(runner="b", durations={"b0": 1.0, "b1": 1.0}),
+    ]
+    table = SpeedupTable(records)
+    base_durs = records[0].get_values_by_metric("duration")
+    expected = make_speedup_record(records[1], base_durs)
+    assert table.average(0, 1) == pytest.approx(
+        expected.value("_speedup", "_average"))
+    with pytest.raises(ValueError):
+        table.average(0, 1, use_geomean=True)
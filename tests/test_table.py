@@ -0,0 +1,78 @@
+import datetime
+import pickle
+
+import pytest
+
+from cbtk.core import Record, Suite
+from cbtk.filter import RecordFilter
+from cbtk.table import RecordTable
+from tests.helpers import make_record
+
+
+def make_table():
+    tz = datetime.timezone(datetime.timedelta(hours=9))
+    return RecordTable.from_records([
+        make_record(runner="a",
+                    run_at=datetime.datetime(2023, 1, 1, tzinfo=tz),
+                    durations={"b0": 1.0, "b1": 2.0}),
+        make_record(runner="b", run_at=datetime.datetime(2023, 1, 2),
+                    durations={"b0": 3.0}),
+        make_record(runner="a", run_at=datetime.datetime(2023, 1, 3),
+                    durations={"b1": 4.0}),
+    ])
+
+
+def test_view():
+    table = make_table()
+    assert len(table) == 3
+    assert len(table.values) == 4
+
+    view = table[0]
+    assert view.hostname == "host"
+    assert view.suite == Suite("suite")
+    assert view.runner.name == "a"
+    assert view.run_at.isoformat() == "2023-01-01T00:00:00+09:00"
+    assert view.benchmarks == ["b0", "b1"]
+    assert view.value("duration", "b1") == 2.0
+    assert view.get_values_by_metric("duration") == {"b0": 1.0, "b1": 2.0}
+    assert table[1].run_at.isoformat() == "2023-01-02T00:00:00"
+
+
+def test_group_indices():
+    table = make_table()
+    grouped = table.group_indices("runner")
+    assert list(grouped.values()) == [[0, 2], [1]]
+    assert [v.runner.name for v in table.select(grouped[(0, )])] == ["a", "a"]
+
+
+def test_bench_groups():
+    table = make_table()
+    assert list(table.record_groups) == [0, 2, 3, 4]
+    assert list(table.group_bench_ids) == [0, 1, 0, 1]
+    assert list(table.group_offsets) == [0, 1, 2, 3, 4]
+    assert table[2].benchmarks == ["b1"]
+    assert table[2].get_values_by_metric("duration") == {"b1": 4.0}
+    assert table[2].get_values_by_metric("unknown") == {}
+    assert table[0].get_values_by_bench("b1") == {"duration": 2.0}
+    assert table[2].value("duration", "b1") == 4.0
+    with pytest.raises(KeyError):
+        table[2].value("duration", "b0")
+    with pytest.raises(KeyError):
+        table[0].get_values_by_bench("unknown")
+
+
+def test_indices():
+    table = make_table()
+    assert table.indices() == range(3)
+    assert table.indices(RecordFilter(runners=["a"])) == [0, 2]
+    assert table.indices(RecordFilter(hostname="other")) == []
+    since = datetime.datetime(2023, 1, 2)
+    assert table.indices(RecordFilter(since=since)) == [1, 2]
+    assert table.indices(RecordFilter(runners=["a"], since=since)) == [2]
+
+
+def test_pickle_view():
+    view = make_table()[0]
+    record = pickle.loads(pickle.dumps(view))
+    assert isinstance(record, Record)
+    assert record.get_values_by_metric("duration") == {"b0": 1.0, "b1": 2.0}
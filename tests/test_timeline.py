@@ -0,0 +1,83 @@
+import argparse
+import datetime
+import time
+
+import pytest
+
+from cbtk.core import Suite
+from cbtk.pages import make_dirnames
+from cbtk.pages.timeline import (TimelineSeries, downsample_points,
+                                 encode_points, make_dataset,
+                                 make_timeline_series)
+from tests.helpers import make_record
+
+
+def test_make_dirnames():
+    suites = [Suite("a b"), Suite("a b", "x=1"), Suite("a/b"), Suite("..")]
+    assert make_dirnames(suites) == ["a_b", "a_b_x_1_", "a_b-2", "_.."]
+    assert make_dirnames(["a", "a-2", "a"]) == ["a", "a-2", "a-3"]
+
+
+def test_encode_points():
+    points = [
+        {"x": "1970-01-01T00:00:01+00:00", "y": 1.0, "version": "1.0.0",
+         "tags": None},
+        {"x": "1970-01-01T00:00:02.5+00:00", "y": 2.0, "version": "1.0.1",
+         "tags": None},
+        {"x": "1970-01-01T09:00:03+09:00", "y": 3.0, "version": "1.0.0",
+         "tags": "a=1"},
+    ]
+    assert encode_points(points, [1000, 2500, 3000]) == {
+        "x": [1000, 2500, 3000],
+        "y": [1.0, 2.0, 3.0],
+        "version": [0, 1, 0],
+        "versions": ["1.0.0", "1.0.1"],
+        "tag": [0, 0, 1],
+        "tags": [None, "a=1"],
+    }
+
+
+def test_series_xs_in_utc(monkeypatch):
+    jst = datetime.timezone(datetime.timedelta(hours=9))
+    records = [
+        make_record(run_at=datetime.datetime(1970, 1, 1, 0, 0, 1)),
+        make_record(run_at=datetime.datetime(1970, 1, 1, 9, 0, 2, tzinfo=jst)),
+    ]
+
+    for tz in ["UTC", "Asia/Tokyo"]:
+        monkeypatch.setenv("TZ", tz)
+        time.tzset()
+        [ser] = make_timeline_series(records)
+        assert [p["x"] for p in ser.points] == [
+            "1970-01-01T00:00:01+00:00", "1970-01-01T09:00:02+09:00"]
+        assert ser.xs == [1000, 2000]
+    monkeypatch.undo()
+    time.tzset()
+
+
+def make_series(n):
+    points = [{"x": None, "y": float(i % 7), "version": "1.0.0",
+               "tags": None} for i in range(n)]
+    return TimelineSeries("host", Suite("s"), "b", make_record().runner,
+                          points, list(range(n)))
+
+
+def test_downsample_points():
+    ser = make_series(1000)
+    selected, selected_xs = downsample_points(ser.points, ser.xs, 50)
+    assert len(selected) == 50
+    assert selected == [ser.points[x] for x in selected_xs]
+    assert downsample_points(ser.points, ser.xs, 0) == (ser.points, ser.xs)
+
+
+@pytest.mark.parametrize("detail_points, expected", [(0, None), (50, 50),
+                                                     (2000, 1000)])
+def test_make_dataset_detail(detail_points, expected):
+    config = argparse.Namespace(compact_timeline=True, timeline_points=10,
+                                timeline_detail_points=detail_points)
+    ds = make_dataset(make_series(1000), config)
+    assert len(ds["x"]) == 10
+    if expected is None:
+        assert "detail" not in ds
+    else:
+        assert len(ds["detail"]["x"]) == expected
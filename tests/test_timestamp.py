@@ -0,0 +1,14 @@
+import datetime
+
+from cbtk.timestamp import parse_timestamp
+
+
+def test_parse_isoformat():
+    run_at = datetime.datetime(2023, 1, 2, 3, 4, 5, 6789,
+                               tzinfo=datetime.timezone.utc)
+    assert parse_timestamp(run_at.isoformat()) == run_at
+
+
+def test_parse_fallback():
+    run_at = parse_timestamp("Jan 2 2023 03:04:05")
+    assert run_at == datetime.datetime(2023, 1, 2, 3, 4, 5)
@@ -0,0 +1,30 @@
+import cbtk.tracing
+from cbtk.tracing import stage
+
+
+def test_stage_without_tracer():
+    with stage("x"):
+        pass
+
+
+def test_tracer_summary():
+    tracer = cbtk.tracing.start()
+    try:
+        with stage("outer"):
+            for _ in range(2):
+                with stage("inner"):
+                    data = [0] * 100000
+            del data
+    finally:
+        cbtk.tracing.stop()
+
+    summary = tracer.summary()
+    assert list(summary) == ["outer", "inner"]
+    assert summary["inner"]["count"] == 2
+    assert summary["outer"]["wall"] >= summary["inner"]["wall"]
+    # peak of a stage includes its children
+    assert summary["outer"]["memory_peak"] >= summary["inner"]["memory_peak"]
+    assert summary["inner"]["memory_peak"] > 100000 * 8
+
+    depths = {e["name"]: e["depth"] for e in tracer.to_dict()["stages"]}
+    assert depths == {"outer": 0, "inner": 1}
@@ -1,5 +1,7 @@
+import gc
+import pickle
 import pytest
-from cbtk.core import Version
+from cbtk.core import Runner, Suite, Version
 
 
 def test_parse():
@@ -66,3 +68,28 @@ def test_drop_dev():
     v1 = Version.parse("1.2.3.dev4")
     assert v0 != v1
     assert v0 == v1.drop_dev()
+
+
+def test_parse_shared():
+    assert Version.parse("1.2.3.dev4") is Version.parse("1.2.3.dev4")
+    assert Version.parse("1.2.3.dev4").drop_dev() is Version.parse("1.2.3")
+
+
+def test_sort_key():
+    versions = [Version.parse(v) for v in ["1.2.3", "1.2.3.dev12",
+                                           "1.2.3.dev4", "1.1.0"]]
+    assert sorted(versions, key=lambda v: v.sort_key) == sorted(versions)
+
+
+def test_pickle_shared():
+    v = Version.parse("1.2.3")
+    assert pickle.loads(pickle.dumps(v)) is v
+
+
+def test_interned_are_released():
+    Runner.intern("released", Version.parse("9.8.7.dev6"))
+    Suite.intern("released")
+    gc.collect()
+    assert "9.8.7.dev6" not in Version._parsed
+    assert ("released", None) not in Suite._instances
+    assert not any(k[0] == "released" for k in Runner._instances.keys())
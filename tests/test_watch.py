@@ -0,0 +1,59 @@
+import argparse
+import os
+
+from cbtk.main import load_files
+from cbtk.watch import Site
+from tests.helpers import make_raw, write_result
+
+
+def make_site():
+    config = argparse.Namespace(db=None, jobs=1, geomean=False)
+    return Site(config, load_files)
+
+
+def test_site_update(tmp_path):
+    f1, f2 = str(tmp_path / "1.json"), str(tmp_path / "2.json")
+    write_result(f1, [make_raw("s", "a", "1.0.0", "2023-01-01", {"b": 1})])
+    write_result(f2, [make_raw("t", "a", "1.0.0", "2023-01-02", {"b": 2})])
+
+    site = make_site()
+    affected = site.update([f1, f2])
+    assert sorted(str(s) for s in affected) == ["s", "t"]
+    assert len(site.records()) == 2
+    assert site.update([f1, f2]) == set()
+
+    write_result(f2, [
+        make_raw("t", "a", "1.0.0", "2023-01-02", {"b": 2}),
+        make_raw("t", "a", "1.0.0", "2023-01-03", {"b": 3}),
+    ])
+    os.utime(f2, ns=(0, 1))
+    affected = site.update([f1, f2])
+    assert [str(s) for s in affected] == ["t"]
+    assert len(site.records()) == 3
+    assert len(site.charts[next(iter(affected))]) == 1
+
+    affected = site.update([f2])
+    assert [str(s) for s in affected] == ["s"]
+    assert [str(s) for s in site.suites] == ["t"]
+
+
+def test_site_update_half_written(tmp_path, capsys):
+    f1, f2 = str(tmp_path / "1.json"), str(tmp_path / "2.json")
+    write_result(f1, [make_raw("s", "a", "1.0.0", "2023-01-01", {"b": 1})])
+    write_result(f2, [make_raw("t", "a", "1.0.0", "2023-01-02", {"b": 2})])
+    with open(f2) as f:
+        text = f.read()
+    with open(f2, "w") as f:
+        f.write(text[:len(text) // 2])
+
+    site = make_site()
+    affected = site.update([f1, f2])
+    assert [str(s) for s in affected] == ["s"]
+    assert f2 not in site.stats
+    assert f"failed to load {f2}" in capsys.readouterr().err
+
+    with open(f2, "w") as f:
+        f.write(text)
+    affected = site.update([f1, f2])
+    assert [str(s) for s in affected] == ["t"]
+    assert len(site.records()) == 2